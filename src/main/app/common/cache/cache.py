@@ -1,13 +1,55 @@
 """Abstract base class for Cache"""
 
 from abc import ABC, abstractmethod
-from typing import Any
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Type
 
+from pydantic import BaseModel
+
+from src.main.app.common.cache.codec import Codec
 from src.main.app.common.cache.redis_manager import RedisManager
 from src.main.app.common.config.config_manager import load_config
 
 
+def ttl_of(timeout, key: str = None):
+    """
+    Resolve a timeout to whole seconds, timeout may be seconds, a timedelta or a per-key dict of them
+    """
+    if isinstance(timeout, dict):
+        timeout = timeout.get(key)
+    if isinstance(timeout, timedelta):
+        timeout = int(timeout.total_seconds())
+    return timeout or None
+
+
+class CachePipeline:
+    """
+    Operations queued inside Cache.pipeline(), sent in one round trip when the block exits,
+    after which results holds their return values in order.
+    """
+
+    def __init__(self):
+        self.ops: List[Tuple] = []
+        self.results: List[Any] = []
+
+    def get(self, key: str) -> "CachePipeline":
+        self.ops.append(("get", key))
+        return self
+
+    def set(self, key: str, value: Any, timeout=None) -> "CachePipeline":
+        self.ops.append(("set", key, value, timeout))
+        return self
+
+    def delete(self, key: str) -> "CachePipeline":
+        self.ops.append(("delete", key))
+        return self
+
+
 class Cache(ABC):
+    # Codec of the *_object methods, replaced from the config by init_cache_client
+    codec: Codec = Codec()
+
     @abstractmethod
     async def get(self, key: str) -> Any:
         """Retrieve a value by key from the cache."""
@@ -28,19 +70,115 @@ class Cache(ABC):
         """Check if a key exists in the cache."""
         pass
 
+    @abstractmethod
+    async def get_many(self, keys: List[str]) -> List[Any]:
+        """Retrieve the values of keys in one round trip, None for the missing ones."""
+        pass
 
-async def get_cache_client() -> Cache:
+    @abstractmethod
+    async def set_many(self, mapping: Dict[str, Any], timeout=None):
+        """Set several keys in one round trip, timeout may be a dict holding a timeout per key."""
+        pass
+
+    @abstractmethod
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete several keys in one round trip and return how many existed."""
+        pass
+
+    @asynccontextmanager
+    async def pipeline(self) -> AsyncIterator[CachePipeline]:
+        """Queue get/set/delete operations and run them together, atomically where supported."""
+        pipe = CachePipeline()
+        yield pipe
+        pipe.results = await self._run_pipeline(pipe.ops)
+
+    async def _run_pipeline(self, ops: List[Tuple]) -> List[Any]:
+        return [await getattr(self, op[0])(*op[1:]) for op in ops]
+
+    async def get_object(self, key: str, model: Type[BaseModel] = None) -> Any:
+        """Retrieve a value stored by set_object, as an instance of model when given."""
+        return (await self.get_objects([key], model))[0]
+
+    async def set_object(self, key: str, value: Any, timeout=None):
+        """Encode a value, e.g. a Pydantic model, with the codec and set it."""
+        await self.set_objects({key: value}, timeout)
+
+    async def get_objects(self, keys: List[str], model: Type[BaseModel] = None) -> List[Any]:
+        """Retrieve several values stored by set_object(s) in one round trip."""
+        return [self.codec.decode(data, model) for data in await self._get_bytes(keys)]
+
+    async def set_objects(self, mapping: Dict[str, Any], timeout=None):
+        """Encode several values with the codec and set them in one round trip."""
+        await self._set_bytes({key: self.codec.encode(value) for key, value in mapping.items()}, timeout)
+
+    async def get_shared_objects(self, keys: List[str], model: Type[BaseModel] = None) -> List[Any]:
+        """Retrieve values like get_objects, read from the tier shared by every worker, past any local one."""
+        return [self.codec.decode(data, model) for data in await self._get_shared_bytes(keys)]
+
+    async def _get_bytes(self, keys: List[str]) -> List[Optional[bytes]]:
+        return await self.get_many(keys)
+
+    async def _get_shared_bytes(self, keys: List[str]) -> List[Optional[bytes]]:
+        return await self._get_bytes(keys)
+
+    async def _set_bytes(self, mapping: Dict[str, bytes], timeout=None):
+        return await self.set_many(mapping, timeout)
+
+    async def _get_many_ttl(self, keys: List[str], binary: bool = False) -> List[Tuple[Any, Optional[float]]]:
+        """Values of keys with the seconds each has left, None when it does not expire or is unknown."""
+        values = await (self._get_bytes(keys) if binary else self.get_many(keys))
+        return [(value, None) for value in values]
+
+    async def close(self):
+        """Release the resources held by the cache."""
+        pass
+
+
+_cache_client: Optional[Cache] = None
+
+
+async def init_cache_client() -> Cache:
     """
-    Init redis client or page cache client
-    :return:
+    Create the redis client or page cache client shared by the whole process, called once
+    from the app lifespan
+    :return: Cache instance
     """
+    global _cache_client
+    if _cache_client is not None:
+        return _cache_client
+
+    database = load_config().database
+    if database.enable_redis:
+        from src.main.app.common.cache.redis_cache import RedisCache
 
-    from src.main.app.common.cache.redis_cache import RedisCache
+        redis_client = await RedisManager.get_instance()
+        cache_client = RedisCache(redis_client, await RedisManager.get_binary_instance())
+        if database.cache_local_size:
+            from src.main.app.common.cache.tiered_cache import TieredCache
 
-    redis_client = await RedisManager.get_instance()
-    if load_config().database.enable_redis:
-        return RedisCache(redis_client)
+            cache_client = TieredCache(cache_client, redis_client, database.cache_local_size, database.cache_local_ttl)
     else:
         from src.main.app.common.cache.page_cache import PageCache
 
-        return PageCache()
+        cache_client = PageCache()
+    cache_client.codec = Codec(database.cache_serializer, database.cache_compression, database.cache_compress_threshold)
+    _cache_client = cache_client
+    return _cache_client
+
+
+async def close_cache_client() -> None:
+    """
+    Close the shared cache client on shutdown
+    """
+    global _cache_client
+    if _cache_client is not None:
+        cache_client, _cache_client = _cache_client, None
+        await cache_client.close()
+
+
+async def get_cache_client() -> Cache:
+    """
+    Acquire the shared cache client, also usable as a FastAPI dependency
+    :return: Cache instance
+    """
+    return _cache_client or await init_cache_client()
@@ -0,0 +1,141 @@
+"""Codecs turning cache values, including Pydantic models, into compact bytes"""
+
+import json
+import zlib
+from typing import Any, Optional, Type
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+# Frame: format version byte, compression byte, serializer byte, then the serialized [type tag, schema version, data]
+FRAME_VERSION = 2
+_COMPRESSIONS = {"none": 0, "zlib": 1, "zstd": 2, "lz4": 3}
+_SERIALIZERS = {"json": 0, "msgpack": 1}
+
+
+def _compress(method: int, data: bytes) -> bytes:
+    if method == _COMPRESSIONS["zlib"]:
+        return zlib.compress(data)
+    if method == _COMPRESSIONS["zstd"]:
+        return zstandard.ZstdCompressor().compress(data)
+    if method == _COMPRESSIONS["lz4"]:
+        return lz4_frame.compress(data)
+    raise ValueError(f"unknown cache compression method {method}")
+
+
+def _decompress(method: int, data: bytes) -> Optional[bytes]:
+    """None when the method is unknown or its package is not installed"""
+    if method == _COMPRESSIONS["zlib"]:
+        return zlib.decompress(data)
+    if method == _COMPRESSIONS["zstd"] and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompress(data)
+    if method == _COMPRESSIONS["lz4"] and lz4_frame is not None:
+        return lz4_frame.decompress(data)
+    return None
+
+
+class Codec:
+    """
+    Serializes values with json (orjson when installed) or msgpack. Pydantic models are stored
+    as their json-mode dump tagged with the class name and its __cache_version__, so a decode
+    against a different model or schema version reads as a miss instead of stale data. Payloads
+    above compress_threshold bytes are compressed. The frame records both, values written before
+    a change of serializer or compression are still read, and any frame that cannot be is a miss.
+    """
+
+    def __init__(self, serializer: str = "json", compression: str = "zlib", compress_threshold: int = 1024):
+        """
+        Args:
+            serializer: 'json' or 'msgpack'.
+            compression: 'none', 'zlib', 'zstd' or 'lz4'.
+            compress_threshold: Min payload size in bytes to compress.
+        """
+        if serializer == "msgpack" and msgpack is None:
+            raise ImportError("cache serializer 'msgpack' requires the msgpack package")
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("cache compression 'zstd' requires the zstandard package")
+        if compression == "lz4" and lz4_frame is None:
+            raise ImportError("cache compression 'lz4' requires the lz4 package")
+        self.serializer = _SERIALIZERS[serializer]
+        self.compression = _COMPRESSIONS[compression]
+        self.compress_threshold = compress_threshold
+
+    def encode(self, value: Any) -> bytes:
+        if isinstance(value, BaseModel):
+            model = type(value)
+            payload = [model.__name__, getattr(model, "__cache_version__", 1), value.model_dump(mode="json")]
+        else:
+            payload = [None, None, value]
+        data = self._dumps(payload)
+        method = 0
+        if self.compression and len(data) >= self.compress_threshold:
+            method = self.compression
+            data = _compress(method, data)
+        return bytes((FRAME_VERSION, method, self.serializer)) + data
+
+    def decode(self, data: Optional[bytes], model: Type[BaseModel] = None) -> Any:
+        """
+        Args:
+            data: The cached bytes, None for a miss.
+            model: The Pydantic model the value was cached as, None for plain values.
+
+        Returns:
+            The value, or None when missing, cached from another model or schema version, or
+            written in a frame this process cannot read.
+        """
+        if not isinstance(data, bytes) or len(data) < 3 or data[0] != FRAME_VERSION:
+            return None
+        try:
+            body = data[3:]
+            if data[1]:
+                body = _decompress(data[1], body)
+                # Written with a compression this process cannot read
+                if body is None:
+                    return None
+            payload = _loads(data[2], body)
+            if not isinstance(payload, list) or len(payload) != 3:
+                return None
+            tag, version, value = payload
+            if model is None:
+                return value if tag is None else None
+            if tag != model.__name__ or version != getattr(model, "__cache_version__", 1):
+                return None
+            return model.model_validate(value)
+        except Exception:
+            # A corrupt body or a dump the model no longer validates, the value is recomputed
+            return None
+
+    def _dumps(self, payload: list) -> bytes:
+        if self.serializer == _SERIALIZERS["msgpack"]:
+            return msgpack.packb(payload, use_bin_type=True)
+        if orjson is not None:
+            return orjson.dumps(payload)
+        return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def _loads(serializer: int, data: bytes) -> Optional[list]:
+    """None when the serializer is unknown or its package is not installed"""
+    if serializer == _SERIALIZERS["json"]:
+        return orjson.loads(data) if orjson is not None else json.loads(data)
+    if serializer == _SERIALIZERS["msgpack"] and msgpack is not None:
+        return msgpack.unpackb(data, raw=False)
+    return None
@@ -1,10 +1,11 @@
 """Simple in-memory page cache implementation"""
 
-from typing import Any
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import diskcache
 
-from src.main.app.common.cache.cache import Cache
+from src.main.app.common.cache.cache import Cache, ttl_of
 
 
 class PageCache(Cache):
@@ -17,9 +18,7 @@ class PageCache(Cache):
 
     async def set(self, key: str, value: Any, timeout: int = None) -> None:
         """Set the value for a key in the in-memory cache."""
-        self.cache.set(key, value)
-        if timeout:
-            self.cache.expire(key, timeout)
+        self.cache.set(key, value, expire=ttl_of(timeout))
 
     async def delete(self, key: str) -> bool:
         """Delete a key from the in-memory cache."""
@@ -33,3 +32,39 @@ class PageCache(Cache):
         if key in self.cache:
             return True
         return False
+
+    async def get_many(self, keys: List[str]) -> List[Any]:
+        """Retrieve several values from the in-memory cache."""
+        return [self.cache.get(key) for key in keys]
+
+    async def _get_many_ttl(self, keys: List[str], binary: bool = False) -> List[Tuple[Any, Optional[float]]]:
+        now = time.time()
+        entries = [self.cache.get(key, expire_time=True) for key in keys]
+        return [(value, expire_time - now if expire_time else None) for value, expire_time in entries]
+
+    async def set_many(self, mapping: Dict[str, Any], timeout=None) -> None:
+        """Set several keys in one diskcache transaction."""
+        with self.cache.transact():
+            for key, value in mapping.items():
+                self.cache.set(key, value, expire=ttl_of(timeout, key))
+
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete several keys in one diskcache transaction."""
+        with self.cache.transact():
+            return sum(1 for key in keys if self.cache.delete(key))
+
+    async def _run_pipeline(self, ops: List[Tuple]) -> List[Any]:
+        with self.cache.transact():
+            results = []
+            for op in ops:
+                if op[0] == "get":
+                    results.append(self.cache.get(op[1]))
+                elif op[0] == "set":
+                    results.append(self.cache.set(op[1], op[2], expire=ttl_of(op[3])))
+                else:
+                    results.append(self.cache.delete(op[1]))
+            return results
+
+    async def close(self) -> None:
+        """Close the underlying cache directory."""
+        self.cache.close()
@@ -1,13 +1,19 @@
 """Redis cache implementation"""
 
-from typing import Any
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from src.main.app.common.cache.cache import Cache
+from src.main.app.common.cache.cache import Cache, ttl_of
 
 
 class RedisCache(Cache):
-    def __init__(self, redis_client):
+    def __init__(self, redis_client, binary_client=None):
+        """
+        Args:
+            redis_client: Client decoding responses to str.
+            binary_client: Client returning raw bytes for the *_object methods, redis_client by default.
+        """
         self.redis_client = redis_client
+        self.binary_client = binary_client or redis_client
 
     async def get(self, key: str) -> Any:
         """Retrieve a value by key from Redis."""
@@ -27,3 +33,70 @@ class RedisCache(Cache):
     async def exists(self, key: str):
         """Check if a key exists in Redis."""
         return await self.redis_client.exists(key)
+
+    async def get_many(self, keys: List[str]) -> List[Any]:
+        """Retrieve several values from Redis with one MGET."""
+        if not keys:
+            return []
+        return await self.redis_client.mget(keys)
+
+    async def set_many(self, mapping: Dict[str, Any], timeout=None):
+        """Set several keys in Redis with one MSET, or one pipeline when they expire."""
+        await self._set_many(self.redis_client, mapping, timeout)
+
+    async def _get_bytes(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+        return await self.binary_client.mget(keys)
+
+    async def _set_bytes(self, mapping: Dict[str, bytes], timeout=None):
+        await self._set_many(self.binary_client, mapping, timeout)
+
+    async def _get_many_ttl(self, keys: List[str], binary: bool = False) -> List[Tuple[Any, Optional[float]]]:
+        if not keys:
+            return []
+        # MGET and the PTTL of every key in one round trip, PTTL is negative for a key without expiry
+        async with (self.binary_client if binary else self.redis_client).pipeline(transaction=False) as pipe:
+            pipe.mget(keys)
+            for key in keys:
+                pipe.pttl(key)
+            values, *ttls = await pipe.execute()
+        return [(value, ttl / 1000 if ttl >= 0 else None) for value, ttl in zip(values, ttls)]
+
+    @staticmethod
+    async def _set_many(client, mapping: Dict[str, Any], timeout) -> None:
+        if not mapping:
+            return
+        if not timeout:
+            await client.mset(mapping)
+            return
+        async with client.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                ttl = ttl_of(timeout, key)
+                if ttl:
+                    pipe.setex(key, ttl, value)
+                else:
+                    pipe.set(key, value)
+            await pipe.execute()
+
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete several keys from Redis with one DEL."""
+        keys = list(keys)
+        if not keys:
+            return 0
+        return await self.redis_client.delete(*keys)
+
+    async def _run_pipeline(self, ops: List[Tuple]) -> List[Any]:
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            for op in ops:
+                if op[0] == "set" and ttl_of(op[3]):
+                    pipe.setex(op[1], ttl_of(op[3]), op[2])
+                else:
+                    getattr(pipe, op[0])(*op[1:3])
+            return await pipe.execute()
+
+    async def close(self):
+        """Close the shared Redis connection pool."""
+        from src.main.app.common.cache.redis_manager import RedisManager
+
+        await RedisManager.close()
@@ -11,8 +11,14 @@ from src.main.app.common.config.config_manager import load_config
 class RedisManager:
     _instance: Optional[redis.Redis] = None
     _connection_pool: Optional[redis.ConnectionPool] = None
+    _binary_instance: Optional[redis.Redis] = None
     _lock = asyncio.Lock()
 
+    @staticmethod
+    def _url() -> str:
+        database = load_config().database
+        return f"redis://:{database.cache_pass}@{database.cache_host}:{database.cache_port}/{database.db_num}"
+
     @classmethod
     async def get_instance(cls) -> redis.Redis:
         """
@@ -21,11 +27,32 @@ class RedisManager:
         if cls._instance is None:
             async with cls._lock:
                 if cls._connection_pool is None:
-                    database = load_config().database
-                    cls._connection_pool = redis.ConnectionPool.from_url(
-                        f"redis://:{database.cache_pass}@{database.cache_host}:{database.cache_port}/{database.db_num}",
-                        decode_responses=True,
-                    )
+                    cls._connection_pool = redis.ConnectionPool.from_url(cls._url(), decode_responses=True)
                 if cls._instance is None:
                     cls._instance = await redis.Redis.from_pool(cls._connection_pool)
         return cls._instance
+
+    @classmethod
+    async def get_binary_instance(cls) -> redis.Redis:
+        """
+        Get redis instance returning raw bytes, for codec encoded values
+        """
+        if cls._binary_instance is None:
+            async with cls._lock:
+                if cls._binary_instance is None:
+                    cls._binary_instance = await redis.Redis.from_pool(redis.ConnectionPool.from_url(cls._url()))
+        return cls._binary_instance
+
+    @classmethod
+    async def close(cls) -> None:
+        """
+        Close the redis instance and its connection pool
+        """
+        async with cls._lock:
+            if cls._instance is not None:
+                await cls._instance.aclose()
+            if cls._binary_instance is not None:
+                await cls._binary_instance.aclose()
+            cls._instance = None
+            cls._binary_instance = None
+            cls._connection_pool = None
@@ -0,0 +1,229 @@
+"""Two-tier cache, a bounded in-process LRU in front of a shared cache"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from src.main.app.common.cache.cache import Cache
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+# Local tier key prefix of codec encoded values
+BYTES = "bytes"
+
+
+class CacheMetrics:
+    """
+    Hit rate of the local tier and latency of the shared tier
+    """
+
+    def __init__(self):
+        self.local_hits = 0
+        self.local_misses = 0
+        self.remote_calls = 0
+        self.remote_seconds = 0.0
+
+    def snapshot(self) -> dict:
+        lookups = self.local_hits + self.local_misses
+        return {
+            "local_hits": self.local_hits,
+            "local_misses": self.local_misses,
+            "local_hit_rate": self.local_hits / lookups if lookups else 0.0,
+            "remote_calls": self.remote_calls,
+            "remote_avg_ms": self.remote_seconds * 1000 / self.remote_calls if self.remote_calls else 0.0,
+        }
+
+
+class TieredCache(Cache):
+    """
+    Serves hot keys from a bounded in-process LRU and falls back to the shared cache, e.g. RedisCache.
+    Every write or delete evicts the key locally and is published on a Redis channel so the other
+    workers evict it too. Local entries also expire after local_ttl seconds as a safety net, or
+    sooner when the key expires in the shared tier.
+    """
+
+    def __init__(self, remote: Cache, redis_client=None, max_size: int = 10000, local_ttl: int = 60):
+        """
+        Args:
+            remote: The shared cache tier.
+            redis_client: Redis client carrying the invalidation messages, None for a single worker.
+            max_size: Max number of keys held in process.
+            local_ttl: Max seconds a key is served from the process.
+        """
+        self.remote = remote
+        self.redis_client = redis_client
+        self.max_size = max_size
+        self.local_ttl = local_ttl
+        self.metrics = CacheMetrics()
+        self._local: OrderedDict[Any, Tuple[float, Any]] = OrderedDict()
+        self._instance_id = uuid.uuid4().hex
+        self._subscriber: Optional[asyncio.Task] = None
+        # Bumped by every invalidation, a get racing one does not fill the local tier
+        self._generation = 0
+
+    async def get(self, key: str) -> Any:
+        """Retrieve a value from the local tier, or from the shared tier on a miss."""
+        self._ensure_subscriber()
+        entry = self._local.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._local.move_to_end(key)
+            self.metrics.local_hits += 1
+            return entry[1]
+        self.metrics.local_misses += 1
+        generation = self._generation
+        value, ttl = (await self._remote(self.remote._get_many_ttl([key])))[0]
+        if value is not None and generation == self._generation:
+            self._store(key, value, ttl)
+        return value
+
+    async def set(self, key: str, value: Any, timeout=None):
+        """Set the value in the shared tier and evict the key from every local tier."""
+        result = await self._remote(self.remote.set(key, value, timeout))
+        await self._invalidate(key)
+        return result
+
+    async def delete(self, key: str):
+        """Delete the key from the shared tier and every local tier."""
+        result = await self._remote(self.remote.delete(key))
+        await self._invalidate(key)
+        return result
+
+    async def exists(self, key: str):
+        """Check if a key exists, answering from the local tier when it holds the key."""
+        entry = self._local.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return True
+        return await self._remote(self.remote.exists(key))
+
+    async def get_many(self, keys: List[str]) -> List[Any]:
+        """Retrieve several values, fetching only the local misses from the shared tier in one call."""
+        return await self._get_many(keys, keys, binary=False)
+
+    async def _get_bytes(self, keys: List[str]) -> List[Optional[bytes]]:
+        # Encoded values live apart from the str ones of the same key
+        return await self._get_many(keys, [(BYTES, key) for key in keys], binary=True)
+
+    async def _get_shared_bytes(self, keys: List[str]) -> List[Optional[bytes]]:
+        return await self._remote(self.remote._get_shared_bytes(keys))
+
+    async def _set_bytes(self, mapping: Dict[str, bytes], timeout=None):
+        result = await self._remote(self.remote._set_bytes(mapping, timeout))
+        await self._invalidate(*mapping)
+        return result
+
+    async def _get_many(self, keys: List[str], local_keys: List, binary: bool) -> List[Any]:
+        self._ensure_subscriber()
+        now = time.monotonic()
+        values: List[Any] = [None] * len(keys)
+        misses = []
+        for index, local_key in enumerate(local_keys):
+            entry = self._local.get(local_key)
+            if entry is not None and entry[0] > now:
+                self._local.move_to_end(local_key)
+                values[index] = entry[1]
+            else:
+                misses.append(index)
+        self.metrics.local_hits += len(keys) - len(misses)
+        self.metrics.local_misses += len(misses)
+        if misses:
+            generation = self._generation
+            fetched = await self._remote(self.remote._get_many_ttl([keys[index] for index in misses], binary))
+            for index, (value, ttl) in zip(misses, fetched):
+                values[index] = value
+                if value is not None and generation == self._generation:
+                    self._store(local_keys[index], value, ttl)
+        return values
+
+    async def set_many(self, mapping: Dict[str, Any], timeout=None):
+        """Set several keys in the shared tier and evict them from every local tier."""
+        result = await self._remote(self.remote.set_many(mapping, timeout))
+        await self._invalidate(*mapping)
+        return result
+
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete several keys from the shared tier and every local tier."""
+        keys = list(keys)
+        result = await self._remote(self.remote.delete_many(keys))
+        await self._invalidate(*keys)
+        return result
+
+    async def _run_pipeline(self, ops: List[Tuple]) -> List[Any]:
+        results = await self._remote(self.remote._run_pipeline(ops))
+        await self._invalidate(*(op[1] for op in ops if op[0] != "get"))
+        return results
+
+    def _store(self, key, value: Any, ttl: Optional[float] = None) -> None:
+        # Never served locally past its expiry in the shared tier
+        ttl = self.local_ttl if ttl is None else min(self.local_ttl, ttl)
+        if ttl <= 0:
+            return
+        self._local[key] = (time.monotonic() + ttl, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    async def _remote(self, awaitable):
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.metrics.remote_calls += 1
+            self.metrics.remote_seconds += time.perf_counter() - start
+
+    def _evict(self, key: str) -> None:
+        self._generation += 1
+        self._local.pop(key, None)
+        self._local.pop((BYTES, key), None)
+
+    async def _invalidate(self, *keys: str) -> None:
+        if not keys:
+            return
+        for key in keys:
+            self._evict(key)
+        if self.redis_client is not None:
+            # One message per call, the keys are newline separated
+            await self.redis_client.publish(INVALIDATION_CHANNEL, f"{self._instance_id}:" + "\n".join(keys))
+
+    def _ensure_subscriber(self) -> None:
+        if self.redis_client is None:
+            return
+        loop = asyncio.get_running_loop()
+        if self._subscriber is not None and not self._subscriber.done() and self._subscriber.get_loop() is loop:
+            return
+        self._subscriber = loop.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        pubsub = self.redis_client.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                data = message["data"]
+                if isinstance(data, bytes):
+                    data = data.decode()
+                instance_id, _, keys = data.partition(":")
+                if instance_id != self._instance_id:
+                    for key in keys.split("\n"):
+                        self._evict(key)
+        except Exception as e:
+            # Without invalidations the local tier may be stale, drop it and resubscribe on next get
+            logger.error(f"{e}")
+            self._generation += 1
+            self._local.clear()
+        finally:
+            await pubsub.aclose()
+
+    async def close(self):
+        """Stop listening for invalidations and close the shared tier."""
+        if self._subscriber is not None:
+            self._subscriber.cancel()
+            self._subscriber = None
+        self._local.clear()
+        await self.remote.close()
+
+    def local_stats(self) -> Dict[str, Any]:
+        return {"size": len(self._local), "max_size": self.max_size, **self.metrics.snapshot()}
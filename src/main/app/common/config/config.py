@@ -1,5 +1,6 @@
 import os.path
 from os import makedirs
+from typing import Dict, Optional
 
 
 class ServerConfig:
@@ -74,6 +75,17 @@ class DatabaseConfig:
         cache_port: int = 6379,
         cache_pass: str = "",
         db_num: int = 0,
+        cache_local_size: int = 10000,
+        cache_local_ttl: int = 60,
+        cache_serializer: str = "json",
+        cache_compression: str = "zlib",
+        cache_compress_threshold: int = 1024,
+        replica_urls: str = "",
+        replica_selection: str = "round_robin",
+        replica_health_interval: int = 30,
+        databases: Dict[str, str] = None,
+        database_header: Optional[str] = None,
+        engine_idle_timeout: int = 600,
     ) -> None:
         """
         Initializes database configuration with a default database entity.
@@ -92,6 +104,25 @@ class DatabaseConfig:
             cache_port (int): Redis port number. Default is 6379.
             cache_pass (str): Redis password. Default is empty.
             db_num (int): Redis database number. Default is 0.
+            cache_local_size (int): Max keys kept in process in front of Redis, 0 disables the local tier.
+                                    Default is 10000.
+            cache_local_ttl (int): Max seconds a key is served from the local tier. Default is 60 sec.
+            cache_serializer (str): Serializer of cached objects, 'json' (orjson when installed) or 'msgpack'.
+                                    Default is 'json'.
+            cache_compression (str): Compression of large cached objects, 'none', 'zlib', 'zstd' or 'lz4'.
+                                     Default is 'zlib'.
+            cache_compress_threshold (int): Min encoded size in bytes to compress. Default is 1024.
+            replica_urls (str): Comma-separated urls of read replicas serving read-only queries. Default is empty.
+            replica_selection (str): How a replica is picked, 'round_robin' or 'least_connections'.
+                                     Default is 'round_robin'.
+            replica_health_interval (int): Seconds between replica health checks. Default is 30 sec.
+            databases (Dict[str, str]): Extra logical databases, e.g. one per tenant, mapping name to url.
+                                        Default is None.
+            database_header (str): Request header selecting one of databases. It is not authorized, only set it
+                                   when every caller may reach every database. Otherwise the database comes
+                                   from the 'database' claim of the verified token. Default is None.
+            engine_idle_timeout (int): Seconds after which an unused engine of databases is disposed,
+                                       0 keeps them. Default is 600 sec.
         """
         self.dialect = dialect
         self.db_name = db_name
@@ -114,6 +145,17 @@ class DatabaseConfig:
         self.cache_port = cache_port
         self.cache_pass = cache_pass
         self.db_num = db_num
+        self.cache_local_size = cache_local_size
+        self.cache_local_ttl = cache_local_ttl
+        self.cache_serializer = cache_serializer
+        self.cache_compression = cache_compression
+        self.cache_compress_threshold = cache_compress_threshold
+        self.replica_urls = replica_urls
+        self.replica_selection = replica_selection
+        self.replica_health_interval = replica_health_interval
+        self.databases = databases or {}
+        self.database_header = database_header
+        self.engine_idle_timeout = engine_idle_timeout
 
     def __repr__(self) -> str:
         """
@@ -137,6 +179,16 @@ class SecurityConfig:
         white_list_routes: str = "/v1/probe/liveness, /v1/probe/readiness, /v1/user/login, /v1/user/add, /v1/user/refreshTokens, /v1/user/export",
         backend_cors_origins: str = "http://127.0.0.1:8200, http://localhost:8200, http://localhost",
         black_ip_list: str = "",
+        hash_executor: str = "thread",
+        hash_workers: int = 0,
+        hash_concurrency: int = 0,
+        dummy_verify: bool = True,
+        hash_schemes: str = "bcrypt",
+        bcrypt_rounds: int = 12,
+        argon2_time_cost: int = 2,
+        argon2_memory_cost: int = 19456,
+        argon2_parallelism: int = 1,
+        token_cache_size: int = 10000,
     ) -> None:
         """
         Initializes security configuration with default values for algorithm,
@@ -154,10 +206,26 @@ class SecurityConfig:
             refresh_token_expire_minutes (int): The number of minutes until the refresh
                                            token expires. Default is 43200 minutes.
             white_list_routes (str): Comma-separated list of routes which can be accessed
-                                    without authentication. Default includes common probe and user routes.
+                                    without authentication, a {param} segment matches any one segment
+                                    and a trailing /* any sub path. Default includes common probe and user routes.
             backend_cors_origins (str): Comma-separated list of allowed CORS origins.
                                        Default includes common local development URLs.
             black_ip_list (str): Comma-separated list of blocked IP addresses. Default is empty.
+            hash_executor (str): Executor hashing and verifying passwords, 'thread' or 'process'.
+                                 Default is 'thread', bcrypt releases the GIL.
+            hash_workers (int): Number of password hashing workers. Default is 0, the CPU count.
+            hash_concurrency (int): Max hash/verify calls submitted to the executor at once, the rest
+                                    wait on the event loop. Default is 0, the number of workers.
+            dummy_verify (bool): Verify the password against a dummy hash when the username is unknown,
+                                 so failed logins take the same time either way. Default is True.
+            hash_schemes (str): Comma-separated password hash schemes, the first hashes new passwords and
+                                the rest are only verified and upgraded at login. Default is 'bcrypt'.
+            bcrypt_rounds (int): Bcrypt cost factor. Default is 12.
+            argon2_time_cost (int): Argon2 iterations. Default is 2.
+            argon2_memory_cost (int): Argon2 memory in KiB. Default is 19456.
+            argon2_parallelism (int): Argon2 lanes. Default is 1.
+            token_cache_size (int): Max verified tokens kept until their exp, 0 disables the cache.
+                                    Default is 10000.
         """
         self.enable = enable
         self.enable_swagger = enable_swagger
@@ -168,6 +236,16 @@ class SecurityConfig:
         self.white_list_routes = white_list_routes
         self.backend_cors_origins = backend_cors_origins
         self.black_ip_list = black_ip_list
+        self.hash_executor = hash_executor
+        self.hash_workers = hash_workers
+        self.hash_concurrency = hash_concurrency
+        self.dummy_verify = dummy_verify
+        self.hash_schemes = hash_schemes
+        self.bcrypt_rounds = bcrypt_rounds
+        self.argon2_time_cost = argon2_time_cost
+        self.argon2_memory_cost = argon2_memory_cost
+        self.argon2_parallelism = argon2_parallelism
+        self.token_cache_size = token_cache_size
 
     def __repr__(self) -> str:
         """
@@ -25,6 +25,7 @@ class ResponseCode(Enum):
     TEMPLATE_NOT_FOUND_ERROR = (500, "Template not found")
     USER_NAME_EXISTS = (100, "Username already exists")
     ROLE_ALREADY_EXISTS = (101, "Assign role already exists")
+    INVALID_CURSOR_ERROR = (400, "Invalid pagination cursor")
 
     @property
     def code(self):
@@ -69,6 +70,26 @@ class SortEnum(str, Enum):
     descending = "desc"
 
 
+class CountStrategy(str, Enum):
+    """
+    Enum for how the total row of a page is computed.
+    """
+
+    exact = "exact"  # count(*) on every call
+    estimated = "estimated"  # planner statistics, fall back to exact when unavailable
+    cached = "cached"  # exact count cached by filter hash, cleared on writes
+
+
+class ExportFormat(str, Enum):
+    """
+    Enum for export file formats.
+    """
+
+    xlsx = "xlsx"
+    csv = "csv"
+    ndjson = "ndjson"
+
+
 class TokenTypeEnum(str, Enum):
     """
     Enum for token entity.
@@ -0,0 +1,183 @@
+"""Read-through entity cache by primary key, invalidated after the writing transaction commits"""
+
+import asyncio
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Type
+
+from loguru import logger
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.main.app.common.cache.cache import get_cache_client
+
+# Session info entry holding the keys to drop from the cache once the transaction commits
+PENDING_KEYS = "entity_cache_keys"
+# Session info entry holding the invalidations started by its commits, awaited by flush_invalidations
+INVALIDATIONS = "entity_cache_invalidations"
+# Seconds an invalidated key holds its tombstone, longer than any read that could fill it
+TOMBSTONE_TTL = 60
+# Invalidations scheduled after a commit, referenced until done so they are not garbage collected
+_tasks: Set[asyncio.Task] = set()
+
+
+class EntityCache:
+    """
+    Caches the entities of one model by id in the shared cache. Ids found missing are cached
+    too, for negative_ttl seconds, so lookups of unknown ids do not reach the database either.
+    Writes record the affected keys on their session, once it commits each key is replaced by a
+    tombstone and the keys are forgotten if it rolls back. Until then the writing context reads
+    those ids from the database. A read only fills the keys still as it found them, so a row read
+    before a concurrent commit is not cached over its tombstone.
+    """
+
+    def __init__(
+        self, model: Type[SQLModel], ttl: int, negative_ttl: int = 30, schema: Optional[Type[BaseModel]] = None
+    ):
+        """
+        Args:
+            model: The entity cached.
+            ttl: Seconds an entity is cached.
+            negative_ttl: Seconds a missing id is cached, 0 disables negative caching.
+            schema: Projection of the entity cached and returned instead of it, e.g. one without secrets.
+        """
+        self.model = model
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.schema = schema or model
+        self.table = model.__tablename__
+
+    def project(self, entity: Any) -> Any:
+        """
+        The entity as the schema the cache holds and returns.
+        """
+        return entity if self.schema is self.model else self.schema.model_validate(entity.model_dump())
+
+    def key(self, id: Any, database: Optional[str] = None) -> str:
+        """
+        Key of id in the default database, or in the logical database named database.
+        """
+        table = self.table if database is None else f"{self.table}@{database}"
+        return f"entity:{table}:{id}"
+
+    async def get_many(
+        self, ids: List[Any], session: Optional[AsyncSession], database: Optional[str] = None
+    ) -> Tuple[Dict[Any, Any], List[Any], Dict[Any, Any]]:
+        """
+        Args:
+            ids: The ids to look up.
+            session: The write session of the current context, its pending writes are not read from the cache.
+            database: The logical database read, None for the default one.
+
+        Returns:
+            The entities found by id as the schema, None for the ids cached as missing, the ids to query, and
+            what the cache held for each of those looked up, to pass on to fill.
+        """
+        pending = session.sync_session.info.get(PENDING_KEYS, ()) if session is not None else ()
+        lookup = [id for id in dict.fromkeys(ids) if self.key(id, database) not in pending]
+        found: Dict[Any, Any] = {}
+        seen: Dict[Any, Any] = {}
+        if lookup:
+            cache = await get_cache_client()
+            try:
+                payloads = await cache.get_objects([self.key(id, database) for id in lookup])
+            except Exception as e:
+                # The database stays the source of truth when the cache is down
+                logger.error(f"{e}")
+                payloads = [None] * len(lookup)
+            for id, payload in zip(lookup, payloads):
+                if isinstance(payload, dict) and "v" in payload:
+                    found[id] = None if payload["v"] is None else self.schema.model_validate(payload["v"])
+                else:
+                    seen[id] = payload
+        return found, [id for id in dict.fromkeys(ids) if id not in found], seen
+
+    async def fill(
+        self,
+        entities: Iterable[Any],
+        missing: Iterable[Any],
+        seen: Dict[Any, Any],
+        session: Optional[AsyncSession] = None,
+        database: Optional[str] = None,
+    ) -> None:
+        """
+        Cache the entities read from the database and the ids it does not have, except the
+        pending writes of session which other contexts cannot see yet, and the keys changed in
+        the cache since get_many returned seen, invalidated by a commit the read may predate.
+        """
+        pending = session.sync_session.info.get(PENDING_KEYS, ()) if session is not None else ()
+        mapping: Dict[str, Any] = {}
+        timeouts: Dict[str, int] = {}
+        for entity in entities:
+            key = self.key(entity.id, database)
+            if entity.id in seen and key not in pending:
+                mapping[key] = {"v": self.project(entity).model_dump(mode="json")}
+                timeouts[key] = self.ttl
+        if self.negative_ttl:
+            for id in missing:
+                key = self.key(id, database)
+                if id in seen and key not in pending:
+                    mapping[key] = {"v": None}
+                    timeouts[key] = self.negative_ttl
+        if not mapping:
+            return
+        expected = {self.key(id, database): payload for id, payload in seen.items()}
+        cache = await get_cache_client()
+        try:
+            keys = list(mapping)
+            # Past the local tier, which may still hold what get_many saw after another worker invalidated it
+            for key, payload in zip(keys, await cache.get_shared_objects(keys)):
+                if payload != expected[key]:
+                    del mapping[key]
+            if mapping:
+                await cache.set_objects(mapping, timeouts)
+        except Exception as e:
+            logger.error(f"{e}")
+
+    def invalidate(self, session: AsyncSession, ids: Iterable[Any], database: Optional[str] = None) -> None:
+        """
+        Drop the entities of ids from the cache once the transaction of session commits.
+        """
+        session.sync_session.info.setdefault(PENDING_KEYS, set()).update(self.key(id, database) for id in ids)
+
+
+async def flush_invalidations(session: AsyncSession) -> None:
+    """
+    Wait for the cache invalidations started by the commits of session, so the response to a write
+    is not sent before the cache stops serving what it replaced.
+    """
+    tasks = session.sync_session.info.pop(INVALIDATIONS, None)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+def _after_commit(sync_session) -> None:
+    keys = sync_session.info.pop(PENDING_KEYS, None)
+    if not keys:
+        return
+    # Started right away, a commit outside a DBSession scope is invalidated without being flushed
+    task = asyncio.get_running_loop().create_task(_invalidate(list(keys)))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    sync_session.info.setdefault(INVALIDATIONS, []).append(task)
+
+
+def _after_rollback(sync_session) -> None:
+    # Nothing was written, the cached entities are still current
+    sync_session.info.pop(PENDING_KEYS, None)
+
+
+async def _invalidate(keys: List[str]) -> None:
+    # A tombstone rather than a deletion, a fill finding it changed knows its read may be stale
+    tombstone = {"t": uuid.uuid4().hex}
+    cache = await get_cache_client()
+    try:
+        await cache.set_objects(dict.fromkeys(keys, tombstone), TOMBSTONE_TTL)
+    except Exception as e:
+        logger.error(f"{e}")
+
+
+event.listen(Session, "after_commit", _after_commit)
+event.listen(Session, "after_rollback", _after_rollback)
@@ -0,0 +1,114 @@
+"""Filter plan compiler that caches parameterized select statements built from FilterOperators"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Tuple, Type
+
+from sqlalchemy import bindparam
+from sqlmodel import SQLModel, select, func
+
+from src.main.app.common.enums.enum import FilterOperators, ResponseCode
+from src.main.app.common.exception.exception import SystemException
+
+# Operator applied to a column and its bound parameter, BETWEEN is handled separately
+_COMPARATORS = {
+    FilterOperators.EQ: lambda column, param: column == param,
+    FilterOperators.NE: lambda column, param: column != param,
+    FilterOperators.GT: lambda column, param: column > param,
+    FilterOperators.GE: lambda column, param: column >= param,
+    FilterOperators.LT: lambda column, param: column < param,
+    FilterOperators.LE: lambda column, param: column <= param,
+    FilterOperators.LIKE: lambda column, param: column.like(param),
+}
+_OPERATORS = (*_COMPARATORS, FilterOperators.BETWEEN)
+
+
+class FilterPlan:
+    """
+    Parameterized statements for one operator/column signature of a model.
+    """
+
+    def __init__(self, signature: Tuple, query, count_query):
+        self.signature = signature
+        self.query = query
+        self.count_query = count_query
+
+
+class FilterPlanCompiler:
+    """
+    Turns the FilterOperators kwargs shape into a cached FilterPlan plus its bound values, so
+    repeated filters reuse the same statement objects and hit SQLAlchemy's compiled cache.
+    """
+
+    def __init__(self, model: Type[SQLModel], cache_size: int = 256):
+        """
+        Args:
+            model: The entity the filters apply to.
+            cache_size: Max number of plans kept for the model.
+        """
+        self.model = model
+        self.cache_size = cache_size
+        # Column whitelist resolved once per model
+        self.columns = {column.name: getattr(model, column.name) for column in model.__table__.columns}
+        self._plans: OrderedDict[Tuple, FilterPlan] = OrderedDict()
+
+    def compile(self, **kwargs) -> Tuple[FilterPlan, Dict[str, Any]]:
+        """
+        Resolve the plan matching the filter criteria.
+
+        Args:
+            **kwargs: Filter criteria keyed by FilterOperators, e.g. {"EQ": {"username": "admin"}}.
+
+        Returns:
+            The cached plan and the values to bind when executing it.
+        """
+        signature = []
+        params = {}
+        for operator in _OPERATORS:
+            filters = kwargs.get(operator)
+            if not filters:
+                continue
+            entries = []
+            for column, value in sorted(filters.items()):
+                if column not in self.columns:
+                    raise SystemException(
+                        ResponseCode.PARAMETER_ERROR.code,
+                        f"{ResponseCode.PARAMETER_ERROR.msg}: {column}",
+                    )
+                name = f"{operator}_{column}"
+                if operator == FilterOperators.BETWEEN:
+                    params[f"{name}_start"], params[f"{name}_end"] = value
+                    entries.append(column)
+                elif value is None and operator in (FilterOperators.EQ, FilterOperators.NE):
+                    # Compared as IS NULL / IS NOT NULL, nothing to bind
+                    entries.append((column, None))
+                else:
+                    params[name] = value
+                    entries.append(column)
+            signature.append((operator, tuple(entries)))
+        signature = tuple(signature)
+
+        plan = self._plans.get(signature)
+        if plan is None:
+            plan = self._build(signature)
+            self._plans[signature] = plan
+            while len(self._plans) > self.cache_size:
+                self._plans.popitem(last=False)
+        else:
+            self._plans.move_to_end(signature)
+        return plan, params
+
+    def _build(self, signature: Tuple) -> FilterPlan:
+        query = select(self.model)
+        for operator, entries in signature:
+            for entry in entries:
+                if isinstance(entry, tuple):
+                    column = self.columns[entry[0]]
+                    clause = column.is_(None) if operator == FilterOperators.EQ else column.is_not(None)
+                elif operator == FilterOperators.BETWEEN:
+                    name = f"{operator}_{entry}"
+                    clause = self.columns[entry].between(bindparam(f"{name}_start"), bindparam(f"{name}_end"))
+                else:
+                    clause = _COMPARATORS[operator](self.columns[entry], bindparam(f"{operator}_{entry}"))
+                query = query.filter(clause)
+        count_query = select(func.count()).select_from(query.subquery())
+        return FilterPlan(signature, query, count_query)
@@ -1,14 +1,25 @@
 """Sqlmodel impl that handle database operation"""
 
-from typing import Generic, TypeVar, List, Any, Type, Union, Tuple, Optional
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Generic, TypeVar, List, Any, Type, Union, Tuple, Optional, Dict, AsyncIterator
 
 from pydantic import BaseModel
-from sqlmodel import SQLModel, select, insert, update, delete, func
+from sqlalchemy import case, text
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import CompileError
+from sqlmodel import SQLModel, select, insert, update, delete, or_, and_
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.main.app.common.enums.enum import SortEnum, FilterOperators
+from src.main.app.common.enums.enum import SortEnum, CountStrategy, ResponseCode
+from src.main.app.common.exception.exception import SystemException
+from src.main.app.common.mapper.entity_cache import EntityCache
+from src.main.app.common.mapper.filter_plan import FilterPlan, FilterPlanCompiler
 from src.main.app.common.mapper.mapper_base import MapperBase
 from src.main.app.common.session.db_session_middleware import db
+from src.main.app.common.util.cursor_util import encode_cursor, decode_cursor
 
 ModelType = TypeVar("ModelType", bound=SQLModel)
 SchemaType = TypeVar("SchemaType", bound=BaseModel)
@@ -16,9 +27,48 @@ T = TypeVar("T", bound=SQLModel)
 
 
 class SqlModelMapper(Generic[ModelType], MapperBase):
-    def __init__(self, model: Type[ModelType]):
+    # Max number of filter hashes kept by the cached count strategy
+    count_cache_size: int = 1024
+    # Rows per executemany round trip of batch_insert, by dialect
+    insert_chunk_sizes: Dict[str, int] = {"sqlite": 500, "mysql": 1000, "postgresql": 5000, "default": 1000}
+    # Max bound parameters of one statement, bounds the rows of a batch_upsert chunk
+    max_bind_params: Dict[str, int] = {"sqlite": 32766, "mysql": 65535, "postgresql": 32767, "default": 999}
+
+    def __init__(
+        self,
+        model: Type[ModelType],
+        count_strategy: CountStrategy = CountStrategy.exact,
+        count_cache_ttl: int = 60,
+        upsert_keys: Optional[List[str]] = None,
+        entity_cache_ttl: int = 0,
+        entity_cache_negative_ttl: int = 30,
+        entity_cache_schema: Optional[Type[BaseModel]] = None,
+    ):
+        """
+        Args:
+            model: The entity handled by the mapper.
+            count_strategy: Default strategy used to compute the total row of a page.
+            count_cache_ttl: Seconds a total is kept by the cached count strategy.
+            upsert_keys: Unique columns identifying a conflicting row in batch_upsert. Default is the id.
+            entity_cache_ttl: Seconds select_by_id and select_by_ids keep an entity in the shared cache, 0 disables it.
+            entity_cache_negative_ttl: Seconds an id found missing is cached, 0 disables negative caching.
+            entity_cache_schema: Projection the entities are cached as, e.g. one without secrets. select_by_id
+                and select_by_ids then return it, hit or miss, unless a db_session is passed.
+        """
         self.model = model
+        self.upsert_keys = upsert_keys or ["id"]
         self.db = db
+        self.count_strategy = count_strategy
+        self.count_cache_ttl = count_cache_ttl
+        self.filter_plans = FilterPlanCompiler(model)
+        # Totals cached by logical database and filter hash in this process, cleared on every write through the mapper
+        self._count_cache: OrderedDict[str, Tuple[float, int]] = OrderedDict()
+        # Entities cached by logical database and id across processes, evicted once the writes through the mapper commit
+        self.entity_cache = (
+            EntityCache(model, entity_cache_ttl, entity_cache_negative_ttl, entity_cache_schema)
+            if entity_cache_ttl
+            else None
+        )
 
     async def insert(
         self,
@@ -39,24 +89,136 @@ class SqlModelMapper(Generic[ModelType], MapperBase):
         db_session = db_session or self.db.session
         record = self.model.model_validate(record)
         db_session.add(record)
+        self._count_cache.clear()
+        self._invalidate(db_session, [record.id])
         return record
 
-    async def batch_insert(self, *, records: List[Any], db_session: AsyncSession = None) -> int:
+    async def batch_insert(
+        self,
+        *,
+        records: List[Any],
+        chunk_size: Optional[int] = None,
+        use_copy: bool = False,
+        db_session: AsyncSession = None,
+    ) -> int:
         """
-        Inserts multiple records into the database in a single batch.
+        Inserts multiple records into the database, chunked and sent with the driver executemany.
 
         Args:
             records: A list of record to be inserted, each item either a Model instance or a Schema dict.
+            chunk_size: Rows sent per round trip. If None, uses the default of the dialect.
+            use_copy: Use COPY instead of INSERT when the driver is asyncpg.
             db_session: The database session to use. If None, uses the default session.
 
         Returns:
             The number of records inserted.
         """
+        if not records:
+            return 0
         db_session = db_session or self.db.session
-        orm_records = [self.model.model_validate(record) for record in records]
-        statement = insert(self.model).values([record.model_dump() for record in orm_records])
-        exec_response = await db_session.exec(statement)
-        return exec_response.rowcount
+        dialect = db_session.bind.dialect
+        chunk_size = chunk_size or self.insert_chunk_sizes.get(dialect.name, self.insert_chunk_sizes["default"])
+        # Model instances are already validated, only other records go through pydantic
+        rows = [
+            (record if isinstance(record, self.model) else self.model.model_validate(record)).model_dump()
+            for record in records
+        ]
+
+        if use_copy and dialect.driver == "asyncpg":
+            connection = await db_session.connection()
+            raw_connection = await connection.get_raw_connection()
+            columns = list(rows[0].keys())
+            await raw_connection.driver_connection.copy_records_to_table(
+                self.model.__tablename__,
+                records=[tuple(row[column] for column in columns) for row in rows],
+                columns=columns,
+            )
+        else:
+            statement = insert(self.model)
+            for start in range(0, len(rows), chunk_size):
+                await db_session.exec(statement, params=rows[start : start + chunk_size])
+        self._count_cache.clear()
+        self._invalidate(db_session, [row["id"] for row in rows])
+        return len(rows)
+
+    async def batch_upsert(
+        self,
+        *,
+        records: List[Any],
+        conflict_columns: Optional[List[str]] = None,
+        update_columns: Optional[List[str]] = None,
+        chunk_size: int = 1000,
+        db_session: AsyncSession = None,
+    ) -> int:
+        """
+        Inserts multiple records, updating the existing rows that conflict on the unique columns.
+        Uses ON CONFLICT DO UPDATE on PostgreSQL and SQLite, ON DUPLICATE KEY UPDATE on MySQL.
+
+        Args:
+            records: A list of record to be upserted, each item either a Model instance or a Schema dict.
+            conflict_columns: Unique columns identifying a conflict. If None, uses the upsert keys of the mapper.
+                MySQL ignores it and reports a conflict on any unique key.
+            update_columns: Columns overwritten on conflict. If None, all columns except the primary key and
+                the conflict columns. An empty list keeps the existing rows untouched.
+            chunk_size: Max rows per statement, lowered to fit the bound parameter limit of the dialect.
+            db_session: The database session to use. If None, uses the default session.
+
+        Returns:
+            The number of affected rows as reported by the driver. MySQL counts an updated row twice.
+        """
+        if not records:
+            return 0
+        db_session = db_session or self.db.session
+        dialect_name = db_session.bind.dialect.name
+        if dialect_name == "postgresql":
+            dialect_insert = postgresql.insert
+        elif dialect_name == "sqlite":
+            dialect_insert = sqlite.insert
+        elif dialect_name == "mysql":
+            dialect_insert = mysql.insert
+        else:
+            raise SystemException(
+                ResponseCode.UNSUPPORTED_DIALECT_ERROR.code,
+                f"{ResponseCode.UNSUPPORTED_DIALECT_ERROR.msg}: {dialect_name}",
+            )
+        conflict_columns = conflict_columns or self.upsert_keys
+        if update_columns is None:
+            excluded = set(conflict_columns) | {column.name for column in self.model.__table__.primary_key}
+            update_columns = [column.name for column in self.model.__table__.columns if column.name not in excluded]
+
+        rows = [
+            (record if isinstance(record, self.model) else self.model.model_validate(record)).model_dump()
+            for record in records
+        ]
+        if self.entity_cache is not None:
+            # The conflicting rows keep their own id, look them up to evict their cached entity
+            ids = [row["id"] for row in rows]
+            if update_columns:
+                ids += await self._conflicting_ids(rows, conflict_columns, db_session)
+            self._invalidate(db_session, ids)
+        max_bind_params = self.max_bind_params.get(dialect_name, self.max_bind_params["default"])
+        chunk_size = max(1, min(chunk_size, max_bind_params // len(rows[0])))
+        affected = 0
+        for start in range(0, len(rows), chunk_size):
+            statement = dialect_insert(self.model).values(rows[start : start + chunk_size])
+            if dialect_name == "mysql":
+                if update_columns:
+                    statement = statement.on_duplicate_key_update(
+                        {column: statement.inserted[column] for column in update_columns}
+                    )
+                else:
+                    statement = statement.prefix_with("IGNORE")
+            elif update_columns:
+                statement = statement.on_conflict_do_update(
+                    index_elements=conflict_columns,
+                    set_={column: statement.excluded[column] for column in update_columns},
+                )
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=conflict_columns)
+            exec_response = await db_session.exec(statement)
+            affected += exec_response.rowcount
+        self._count_cache.clear()
+        return affected
 
     async def select_by_id(self, *, id: Any, db_session: AsyncSession = None) -> Union[ModelType, SchemaType]:
         """
@@ -67,9 +229,12 @@ class SqlModelMapper(Generic[ModelType], MapperBase):
             db_session: The database session to use. If None, uses the default session.
 
         Returns:
-            The retrieved record, or None if not found.
+            The retrieved record, or None if not found. Read through the entity cache when it is
+            enabled and no db_session is passed, as the entity_cache_schema if one is set.
         """
-        db_session = db_session or self.db.session
+        if self.entity_cache is not None and db_session is None:
+            return (await self._select_cached([id]))[0]
+        db_session = db_session or self.db.read_session
         statement = select(self.model).where(self.model.id == id)
         exec_response = await db_session.exec(statement)
         return exec_response.one_or_none()
@@ -83,19 +248,59 @@ class SqlModelMapper(Generic[ModelType], MapperBase):
             db_session: The database session to use. If None, uses the default session.
 
         Returns:
-            The retrieved records, or None if not found.
+            The retrieved records, or None if not found. Read through the entity cache when it is
+            enabled and no db_session is passed, as the entity_cache_schema if one is set.
         """
-        db_session = db_session or self.db.session
+        if self.entity_cache is not None and db_session is None:
+            records = await self._select_cached(ids)
+            return list({record.id: record for record in records if record is not None}.values())
+        db_session = db_session or self.db.read_session
         statement = select(self.model).where(self.model.id.in_(ids))
         exec_response = await db_session.exec(statement)
         return exec_response.all()
 
+    async def _select_cached(self, ids: List[Any]) -> List[Any]:
+        """
+        Read the entities of ids from the entity cache, querying only the misses and caching what they return.
+        """
+        # Rows come back keyed by their own id, an id passed as str must match them
+        ids = [self._primary_key(id) for id in ids]
+        lookup = [id for id in dict.fromkeys(ids) if id is not None]
+        session = self.db.current_session()
+        # Each logical database has its own entries, a tenant never reads another one's rows
+        database = self.db.current_database()
+        found, misses, seen = await self.entity_cache.get_many(lookup, session, database)
+        if misses:
+            exec_response = await self.db.read_session.exec(select(self.model).where(self.model.id.in_(misses)))
+            records = exec_response.all()
+            for record in records:
+                found[record.id] = self.entity_cache.project(record)
+            await self.entity_cache.fill(records, [id for id in misses if id not in found], seen, session, database)
+        return [found.get(id) if id is not None else None for id in ids]
+
+    def _primary_key(self, id: Any) -> Any:
+        """
+        The id converted to the Python type of the primary key, None when it cannot match any row.
+        """
+        try:
+            id_type = self.model.__table__.columns["id"].type.python_type
+        except NotImplementedError:
+            return id
+        if isinstance(id, id_type):
+            return id
+        try:
+            return id_type(id)
+        except (TypeError, ValueError):
+            return None
+
     async def select_by_page(
         self,
         *,
         current: int = 1,
         pageSize: int = 100,
         count: bool = True,
+        count_strategy: Optional[CountStrategy] = None,
+        fan_out: bool = False,
         db_session: AsyncSession = None,
         **kwargs,
     ) -> Tuple[List[Any], int]:
@@ -106,6 +311,9 @@ class SqlModelMapper(Generic[ModelType], MapperBase):
             current : The current page number to retrieve (1-indexed)
             pageSize : The number of records per page
             count : Whether to record the total row
+            count_strategy : How to compute the total row, default to the strategy of the mapper
+            fan_out : Run the count on a borrowed pooled session concurrently with the page query,
+                only for read-only requests since the count does not see the request transaction
             db_session : The database session to use
             **kwargs: Additional filter criteria, including:
                 - EQ: Equal to (e.g., {"column_name": value})
@@ -117,51 +325,14 @@ class SqlModelMapper(Generic[ModelType], MapperBase):
                 - BETWEEN: Between two values (e.g., {"column_name": (start, end)})
                 - LIKE: Fuzzy search (e.g., {"column_name": "%value%"})
         """
-        db_session = db_session or self.db.session
-        query = select(self.model)
-
-        # 处理过滤条件
-        if FilterOperators.EQ in kwargs:
-            for column, value in kwargs[FilterOperators.EQ].items():
-                query = query.filter(getattr(self.model, column) == value)
-        if FilterOperators.NE in kwargs:
-            for column, value in kwargs[FilterOperators.NE].items():
-                query = query.filter(getattr(self.model, column) != value)
-        if FilterOperators.GT in kwargs:
-            for column, value in kwargs[FilterOperators.GT].items():
-                query = query.filter(getattr(self.model, column) > value)
-        if FilterOperators.GE in kwargs:
-            for column, value in kwargs[FilterOperators.GE].items():
-                query = query.filter(getattr(self.model, column) >= value)
-        if FilterOperators.LT in kwargs:
-            for column, value in kwargs[FilterOperators.LT].items():
-                query = query.filter(getattr(self.model, column) < value)
-        if FilterOperators.LE in kwargs:
-            for column, value in kwargs[FilterOperators.LE].items():
-                query = query.filter(getattr(self.model, column) <= value)
-        if FilterOperators.BETWEEN in kwargs:
-            for column, (start, end) in kwargs[FilterOperators.BETWEEN].items():
-                query = query.filter(getattr(self.model, column).between(start, end))
-        if FilterOperators.LIKE in kwargs:
-            for column, value in kwargs[FilterOperators.LIKE].items():
-                query = query.filter(getattr(self.model, column).like(value))
-
-        # 计算总数
-        if count:
-            count_query = select(func.count()).select_from(query.subquery())
-            total_count_result = await db_session.exec(count_query)
-            total_count: int = total_count_result.all()[0]
-        else:
-            total_count = 0
+        db_session = db_session or self.db.read_session
+        plan, params = self.filter_plans.compile(**kwargs)
 
         # 分页
-        query = query.offset((current - 1) * pageSize).limit(pageSize)
-
-        # 执行查询
-        exec_response = await db_session.exec(query)
-        records: List[Any] = exec_response.all()
+        page_query = plan.query.offset((current - 1) * pageSize).limit(pageSize)
 
-        return records, total_count
+        # 计算总数并执行查询
+        return await self._count_and_fetch(plan, params, page_query, count, count_strategy, fan_out, db_session)
 
     async def select_by_ordered_page(
         self,
@@ -171,18 +342,29 @@ class SqlModelMapper(Generic[ModelType], MapperBase):
         count: bool = True,
         order_by: Optional[str] = None,
         sort_order: Optional[str] = SortEnum.ascending,
+        cursor: Optional[str] = None,
+        count_strategy: Optional[CountStrategy] = None,
+        fan_out: bool = False,
         db_session: AsyncSession = None,
         **kwargs,
     ) -> Tuple[List[Any], int]:
         """
         Retrieve a list of records, with optional filtering, pagination, and ordering.
 
+        When cursor is not None the page is located by keyset (seek) instead of OFFSET, so
+        the cost of a deep page equals the cost of the first one. An empty cursor starts from
+        the first page, the cursor of the following page is built by build_cursor.
+
         Parameters:
-            current : The current page number to retrieve (1-indexed)
+            current : The current page number to retrieve (1-indexed), ignored in cursor mode
             pageSize : The number of records per page
             count : Whether to record the total row
             order_by : The column to order by
             sort_order : The sort order (ascending or descending)
+            cursor : The cursor returned with the previous page, enable keyset pagination
+            count_strategy : How to compute the total row, default to the strategy of the mapper
+            fan_out : Run the count on a borrowed pooled session concurrently with the page query,
+                only for read-only requests since the count does not see the request transaction
             db_session : The database session to use
             **kwargs: Additional filter criteria, including:
                 - EQ: Equal to (e.g., {"column_name": value})
@@ -194,60 +376,240 @@ class SqlModelMapper(Generic[ModelType], MapperBase):
                 - BETWEEN: Between two values (e.g., {"column_name": (start, end)})
                 - LIKE: Fuzzy search (e.g., {"column_name": "%value%"})
         """
-        db_session = db_session or self.db.session
-        query = select(self.model)
-
-        # 处理过滤条件
-        if FilterOperators.EQ in kwargs:
-            for column, value in kwargs[FilterOperators.EQ].items():
-                query = query.filter(getattr(self.model, column) == value)
-        if FilterOperators.NE in kwargs:
-            for column, value in kwargs[FilterOperators.NE].items():
-                query = query.filter(getattr(self.model, column) != value)
-        if FilterOperators.GT in kwargs:
-            for column, value in kwargs[FilterOperators.GT].items():
-                query = query.filter(getattr(self.model, column) > value)
-        if FilterOperators.GE in kwargs:
-            for column, value in kwargs[FilterOperators.GE].items():
-                query = query.filter(getattr(self.model, column) >= value)
-        if FilterOperators.LT in kwargs:
-            for column, value in kwargs[FilterOperators.LT].items():
-                query = query.filter(getattr(self.model, column) < value)
-        if FilterOperators.LE in kwargs:
-            for column, value in kwargs[FilterOperators.LE].items():
-                query = query.filter(getattr(self.model, column) <= value)
-        if FilterOperators.BETWEEN in kwargs:
-            for column, (start, end) in kwargs[FilterOperators.BETWEEN].items():
-                query = query.filter(getattr(self.model, column).between(start, end))
-        if FilterOperators.LIKE in kwargs:
-            for column, value in kwargs[FilterOperators.LIKE].items():
-                query = query.filter(getattr(self.model, column).like(value))
-
-        # 计算总数
-        if count:
-            count_query = select(func.count()).select_from(query.subquery())
-            total_count_result = await db_session.exec(count_query)
-            total_count: int = total_count_result.all()[0]
+        db_session = db_session or self.db.read_session
+        plan, params = self.filter_plans.compile(**kwargs)
+
+        # 处理排序, id 作为排序相同时的次级排序
+        order_by = self._resolve_order_by(order_by)
+        order_column = getattr(self.model, order_by)
+        ascending = sort_order == SortEnum.ascending
+        if ascending:
+            page_query = plan.query.order_by(order_column.asc())
         else:
-            total_count = 0
-
-        # 处理排序
-        columns = self.model.__table__.columns
-        if order_by is None or order_by not in columns:
-            order_by = "id"
-        if sort_order == SortEnum.ascending:
-            query = query.order_by(getattr(self.model, order_by).asc())
-        else:
-            query = query.order_by(getattr(self.model, order_by).desc())
+            page_query = plan.query.order_by(order_column.desc())
+        if order_by != "id":
+            page_query = page_query.order_by(self.model.id.asc() if ascending else self.model.id.desc())
 
         # 分页
-        query = query.offset((current - 1) * pageSize).limit(pageSize)
+        if cursor is None:
+            page_query = page_query.offset((current - 1) * pageSize).limit(pageSize)
+        else:
+            if cursor:
+                last_value, last_id = decode_cursor(cursor, self._python_type(order_by))
+                seek_clause = self._seek_clause(order_by, last_value, last_id, ascending, db_session.bind.dialect.name)
+                page_query = page_query.filter(seek_clause)
+            page_query = page_query.limit(pageSize)
 
-        # 执行查询
-        exec_response = await db_session.exec(query)
-        records: List[Any] = exec_response.all()
+        # 计算总数并执行查询
+        return await self._count_and_fetch(plan, params, page_query, count, count_strategy, fan_out, db_session)
 
-        return records, total_count
+    async def select_stream(
+        self,
+        *,
+        batch_size: int = 1000,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        snapshot: bool = False,
+        db_session: AsyncSession = None,
+        **kwargs,
+    ) -> AsyncIterator[List[ModelType]]:
+        """
+        Stream the records matching the filter criteria in batches, ordered by id. Rows are fetched
+        through a server-side cursor as they are consumed, so memory is bounded by the batch size.
+
+        Parameters:
+            batch_size : The number of records per batch
+            offset : The number of records to skip
+            limit : Max number of records, None for all matching records
+            snapshot : Read in a read-only repeatable read transaction on PostgreSQL and MySQL, so a
+                long stream sees one consistent state. Only applied when the session has not begun yet
+            db_session : The database session to use
+            **kwargs: Filter criteria, same as select_by_page
+        """
+        db_session = db_session or self.db.read_session
+        dialect_name = db_session.bind.dialect.name
+        if snapshot and dialect_name in ("postgresql", "mysql") and not db_session.in_transaction():
+            execution_options = {"isolation_level": "REPEATABLE READ"}
+            if dialect_name == "postgresql":
+                execution_options["postgresql_readonly"] = True
+            await db_session.connection(execution_options=execution_options)
+        plan, params = self.filter_plans.compile(**kwargs)
+        query = plan.query.order_by(self.model.id.asc()).offset(offset).limit(limit)
+        result = await db_session.stream_scalars(query, params=params, execution_options={"yield_per": batch_size})
+        async for partition in result.partitions():
+            yield partition
+
+    async def count(
+        self,
+        *,
+        count_strategy: Optional[CountStrategy] = None,
+        fan_out: bool = False,
+        db_session: AsyncSession = None,
+        **kwargs,
+    ) -> Tuple[int, bool]:
+        """
+        Count the records matching the filter criteria.
+
+        Parameters:
+            count_strategy : How to compute the total, default to the strategy of the mapper
+            fan_out : Count on a borrowed pooled session, so it can run concurrently with queries
+                on the request session
+            db_session : The database session to use, ignored when fan_out is set
+            **kwargs: Filter criteria, same as select_by_page
+
+        Returns:
+            The total and whether it is exact.
+        """
+        plan, params = self.filter_plans.compile(**kwargs)
+        if fan_out:
+            return await self._fan_out_count(plan, params, count_strategy)
+        db_session = db_session or self.db.read_session
+        return await self._count_query(plan, params, count_strategy, db_session)
+
+    async def _count_and_fetch(
+        self,
+        plan: FilterPlan,
+        params: Dict[str, Any],
+        page_query,
+        count: bool,
+        count_strategy: Optional[CountStrategy],
+        fan_out: bool,
+        db_session: AsyncSession,
+    ) -> Tuple[List[Any], int]:
+        if not count:
+            exec_response = await db_session.exec(page_query, params=params)
+            return exec_response.all(), 0
+        if fan_out:
+            (total_count, _), exec_response = await asyncio.gather(
+                self._fan_out_count(plan, params, count_strategy), db_session.exec(page_query, params=params)
+            )
+            return exec_response.all(), total_count
+        total_count, _ = await self._count_query(plan, params, count_strategy, db_session)
+        exec_response = await db_session.exec(page_query, params=params)
+        return exec_response.all(), total_count
+
+    async def _fan_out_count(
+        self, plan: FilterPlan, params: Dict[str, Any], count_strategy: Optional[CountStrategy]
+    ) -> Tuple[int, bool]:
+        async with self.db.fan_out() as count_session:
+            return await self._count_query(plan, params, count_strategy, count_session)
+
+    async def _count_query(
+        self,
+        plan: FilterPlan,
+        params: Dict[str, Any],
+        count_strategy: Optional[CountStrategy],
+        db_session: AsyncSession,
+    ) -> Tuple[int, bool]:
+        count_strategy = count_strategy or self.count_strategy
+        if count_strategy == CountStrategy.estimated:
+            estimated = await self._estimate_count(plan, params, db_session)
+            if estimated is not None:
+                return estimated, False
+        elif count_strategy == CountStrategy.cached:
+            # Totals of another logical database are not shared
+            database = self.db.current_database()
+            key = hashlib.sha1(f"{database}|{plan.signature!r}|{sorted(params.items())!r}".encode("utf-8")).hexdigest()
+            cached = self._count_cache.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1], False
+            total_count = await self._exact_count(plan, params, db_session)
+            self._count_cache[key] = (time.monotonic() + self.count_cache_ttl, total_count)
+            self._count_cache.move_to_end(key)
+            while len(self._count_cache) > self.count_cache_size:
+                self._count_cache.popitem(last=False)
+            return total_count, True
+        return await self._exact_count(plan, params, db_session), True
+
+    async def _exact_count(self, plan: FilterPlan, params: Dict[str, Any], db_session: AsyncSession) -> int:
+        total_count_result = await db_session.exec(plan.count_query, params=params)
+        return total_count_result.all()[0]
+
+    async def _estimate_count(
+        self, plan: FilterPlan, params: Dict[str, Any], db_session: AsyncSession
+    ) -> Optional[int]:
+        """
+        Estimate the total from planner statistics, return None when no statistics are available.
+        Filtered queries are only estimated on PostgreSQL, other dialects fall back to exact count.
+        """
+        dialect = db_session.bind.dialect
+        table_name = self.model.__tablename__
+        filtered = bool(plan.signature)
+        if dialect.name == "postgresql":
+            if filtered:
+                try:
+                    query = plan.query.params(**params)
+                    sql = str(query.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+                except CompileError:
+                    return None
+                # Sent as driver SQL, text() would read a ':word' inside a literal as a bind parameter
+                connection = await db_session.connection()
+                explain = (await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+                return int(explain[0]["Plan"]["Plan Rows"])
+            statement = text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)")
+        elif filtered:
+            return None
+        elif dialect.name == "mysql":
+            statement = text(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name"
+            )
+        elif dialect.name == "sqlite":
+            stat_table = await db_session.exec(
+                text("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            )
+            if stat_table.first() is None:
+                return None
+            statement = text("SELECT stat FROM sqlite_stat1 WHERE tbl = :table_name")
+            stat = (await db_session.exec(statement, params={"table_name": table_name})).scalar()
+            return int(stat.split()[0]) if stat else None
+        else:
+            return None
+        estimated = (await db_session.exec(statement, params={"table_name": table_name})).scalar()
+        # reltuples is -1 on PostgreSQL when the table has never been analyzed
+        if estimated is None or estimated < 0:
+            return None
+        return int(estimated)
+
+    def build_cursor(self, *, record: Any, order_by: Optional[str] = None) -> str:
+        """
+        Build the cursor pointing after the given record, used to fetch the next keyset page.
+
+        Parameters:
+            record : The last record of the current page
+            order_by : The column the page is ordered by
+        """
+        order_by = self._resolve_order_by(order_by)
+        return encode_cursor(getattr(record, order_by), record.id)
+
+    def _resolve_order_by(self, order_by: Optional[str]) -> str:
+        if order_by is None or order_by not in self.model.__table__.columns:
+            return "id"
+        return order_by
+
+    def _python_type(self, column: str) -> Optional[type]:
+        try:
+            return self.model.__table__.columns[column].type.python_type
+        except NotImplementedError:
+            return None
+
+    def _seek_clause(self, order_by: str, last_value: Any, last_id: Any, ascending: bool, dialect_name: str):
+        id_column = self.model.id
+        after_id = id_column > last_id if ascending else id_column < last_id
+        if order_by == "id":
+            return after_id
+        order_column = getattr(self.model, order_by)
+        if not self.model.__table__.columns[order_by].nullable:
+            after_value = order_column > last_value if ascending else order_column < last_value
+            return or_(after_value, and_(order_column == last_value, after_id))
+        # NULL sorts as the largest value on PostgreSQL and as the smallest on SQLite and MySQL
+        nulls_after = ascending == (dialect_name == "postgresql")
+        if last_value is None:
+            after_null = and_(order_column.is_(None), after_id)
+            return after_null if nulls_after else or_(after_null, order_column.is_not(None))
+        after_value = order_column > last_value if ascending else order_column < last_value
+        after_non_null = or_(after_value, and_(order_column == last_value, after_id))
+        return or_(after_non_null, order_column.is_(None)) if nulls_after else after_non_null
 
     async def update_by_id(self, *, record: Any, db_session: AsyncSession = None) -> int:
         """
@@ -262,6 +624,8 @@ class SqlModelMapper(Generic[ModelType], MapperBase):
         update_values = record.model_dump(exclude_unset=True)
         update_query = update_query.values(**update_values)
         exec_response = await db_session.exec(update_query)
+        self._count_cache.clear()
+        self._invalidate(db_session, [record.id])
         return exec_response.rowcount
 
     async def batch_update_by_ids(self, *, ids: List[Any], record: dict, db_session: AsyncSession = None) -> int:
@@ -278,8 +642,64 @@ class SqlModelMapper(Generic[ModelType], MapperBase):
         for key, value in record.items():
             statement = statement.values({key: value})
         exec_response = await db_session.exec(statement)
+        self._count_cache.clear()
+        self._invalidate(db_session, ids)
         return exec_response.rowcount
 
+    async def batch_update_rows(
+        self, *, records: List[Dict[str, Any]], chunk_size: int = 500, db_session: AsyncSession = None
+    ) -> List[int]:
+        """
+        Update multiple records by their IDs, each with its own values, in one statement per chunk.
+        Records repeating an id are merged in order, a later record overriding the columns it sets.
+
+        Parameters:
+            records : The values to update per record, each containing the id, e.g. [{"id": 1, "nickname": "a"}]
+            chunk_size : Max records per statement, lowered to fit the bound parameter limit of the dialect
+            db_session : The database session to use
+
+        Returns:
+            The number of updated rows of each chunk.
+        """
+        if not records:
+            return []
+        db_session = db_session or self.db.session
+        names = sorted({name for record in records for name in record if name != "id"})
+        if not names or any("id" not in record for record in records):
+            raise SystemException(ResponseCode.PARAMETER_ERROR.code, ResponseCode.PARAMETER_ERROR.msg)
+        for name in names:
+            if name not in self.filter_plans.columns:
+                raise SystemException(ResponseCode.PARAMETER_ERROR.code, f"{ResponseCode.PARAMETER_ERROR.msg}: {name}")
+        merged: Dict[Any, Dict[str, Any]] = {}
+        for record in records:
+            merged.setdefault(record["id"], {}).update(record)
+        records = list(merged.values())
+
+        # Each record binds its id in the IN clause plus an id and a value per column
+        dialect_name = db_session.bind.dialect.name
+        max_bind_params = self.max_bind_params.get(dialect_name, self.max_bind_params["default"])
+        chunk_size = max(1, min(chunk_size, max_bind_params // (1 + 2 * len(names))))
+        rowcounts = []
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start : start + chunk_size]
+            values = {}
+            for name in names:
+                whens = {record["id"]: record[name] for record in chunk if name in record}
+                if whens:
+                    column = getattr(self.model, name)
+                    values[name] = case(whens, value=self.model.id, else_=column)
+            statement = (
+                update(self.model)
+                .where(self.model.id.in_([record["id"] for record in chunk]))
+                .values(values)
+                .execution_options(synchronize_session=False)
+            )
+            exec_response = await db_session.exec(statement)
+            rowcounts.append(exec_response.rowcount)
+        self._count_cache.clear()
+        self._invalidate(db_session, [record["id"] for record in records])
+        return rowcounts
+
     async def delete_by_id(self, *, id: Any, db_session: AsyncSession = None) -> int:
         """
         Delete a single record by its ID.
@@ -291,6 +711,8 @@ class SqlModelMapper(Generic[ModelType], MapperBase):
         db_session = db_session or self.db.session
         statement = delete(self.model).where(self.model.id == id)
         exec_response = await db_session.exec(statement)
+        self._count_cache.clear()
+        self._invalidate(db_session, [id])
         return exec_response.rowcount
 
     async def batch_delete_by_ids(self, *, ids: List[Any], db_session: AsyncSession = None) -> int:
@@ -304,4 +726,23 @@ class SqlModelMapper(Generic[ModelType], MapperBase):
         db_session = db_session or self.db.session
         statement = delete(self.model).where(self.model.id.in_(ids))
         exec_response = await db_session.exec(statement)
+        self._count_cache.clear()
+        self._invalidate(db_session, ids)
         return exec_response.rowcount
+
+    def _invalidate(self, db_session: AsyncSession, ids: List[Any]) -> None:
+        if self.entity_cache is not None:
+            keys = [key for key in map(self._primary_key, ids) if key is not None]
+            self.entity_cache.invalidate(db_session, keys, self.db.current_database())
+
+    async def _conflicting_ids(
+        self, rows: List[Dict[str, Any]], conflict_columns: List[str], db_session: AsyncSession
+    ) -> List[Any]:
+        conditions = [
+            and_(*(getattr(self.model, column) == row[column] for column in conflict_columns)) for row in rows
+        ]
+        ids = []
+        for start in range(0, len(conditions), 500):
+            exec_response = await db_session.exec(select(self.model.id).where(or_(*conditions[start : start + 500])))
+            ids.extend(exec_response.all())
+        return ids
@@ -1,7 +1,7 @@
 """BaseMapper defines the database operations to be implemented"""
 
 from abc import ABC, abstractmethod
-from typing import Any, List, Tuple
+from typing import Any, AsyncIterator, List, Tuple
 
 
 class MapperBase(ABC):
@@ -9,7 +9,20 @@ class MapperBase(ABC):
     async def insert(self, *, record: Any, db_session: Any = None) -> Any: ...
 
     @abstractmethod
-    async def batch_insert(self, *, records: List[Any], db_session: Any = None) -> int: ...
+    async def batch_insert(
+        self, *, records: List[Any], chunk_size: Any = None, use_copy: bool = False, db_session: Any = None
+    ) -> int: ...
+
+    @abstractmethod
+    async def batch_upsert(
+        self,
+        *,
+        records: List[Any],
+        conflict_columns: List[str] = None,
+        update_columns: List[str] = None,
+        chunk_size: int = 1000,
+        db_session: Any = None,
+    ) -> int: ...
 
     @abstractmethod
     async def select_by_id(self, *, id: Any, db_session: Any = None) -> Any: ...
@@ -33,6 +46,7 @@ class MapperBase(ABC):
         pageSize: int,
         order_by: Any,
         sort_order: Any,
+        cursor: Any = None,
         db_session: Any = None,
         **kwargs,
     ) -> Tuple[
@@ -40,12 +54,37 @@ class MapperBase(ABC):
         int,
     ]: ...
 
+    @abstractmethod
+    async def count(
+        self, *, count_strategy: Any = None, fan_out: bool = False, db_session: Any = None, **kwargs
+    ) -> Tuple[int, bool]: ...
+
+    @abstractmethod
+    def build_cursor(self, *, record: Any, order_by: Any = None) -> str: ...
+
+    @abstractmethod
+    def select_stream(
+        self,
+        *,
+        batch_size: int = 1000,
+        offset: int = 0,
+        limit: Any = None,
+        snapshot: bool = False,
+        db_session: Any = None,
+        **kwargs,
+    ) -> AsyncIterator[List[Any]]: ...
+
     @abstractmethod
     async def update_by_id(self, *, record: Any, db_session: Any = None) -> int: ...
 
     @abstractmethod
     async def batch_update_by_ids(self, *, ids: List[Any], record: dict, db_session: Any = None) -> int: ...
 
+    @abstractmethod
+    async def batch_update_rows(
+        self, *, records: List[dict], chunk_size: int = 500, db_session: Any = None
+    ) -> List[int]: ...
+
     @abstractmethod
     async def delete_by_id(self, *, id: Any, db_session: Any = None) -> int: ...
 
@@ -1,49 +1,138 @@
 """Jwt middleware"""
 
 import http
+from typing import Dict, Iterable
 
-from fastapi import Request
-from jose import JWTError
 from loguru import logger
+from starlette.datastructures import Headers
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-from src.main.app.common.config import configs
-from src.main.common.security.security import is_valid_token
-from src.main.server import app
+from src.main.app.common.config.config import SecurityConfig
+from src.main.app.common.enums.enum import ConstantCode
+from src.main.app.common.util.security_util import verify_token
 
 
-@app.middleware("http")
-async def jwt_middleware(request: Request, call_next):
-    raw_url_path = request.url.path
-    if not raw_url_path.__contains__(configs.api_version) or raw_url_path.__contains__(".json"):
-        if configs.enable_swagger:
-            return await call_next(request)
+class RouteMatcher:
+    """
+    Segment trie compiled once from route patterns: exact paths, path parameters matching one
+    segment (/v1/user/{id}) and trailing wildcards matching any sub path (/v1/public/*).
+    """
+
+    _END = "$"
+    _PARAM = "{}"
+    _PREFIX = "*"
+
+    def __init__(self, patterns: Iterable[str]):
+        self._exact = set()
+        self._trie: Dict = {}
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern:
+                continue
+            if "{" not in pattern and not pattern.endswith(self._PREFIX):
+                self._exact.add(pattern.rstrip("/") or "/")
+                continue
+            node = self._trie
+            for segment in pattern.strip("/").split("/"):
+                if segment == self._PREFIX:
+                    node[self._PREFIX] = True
+                    break
+                if segment.startswith("{") and segment.endswith("}"):
+                    segment = self._PARAM
+                node = node.setdefault(segment, {})
+            else:
+                node[self._END] = True
+
+    def match(self, path: str) -> bool:
+        path = path.rstrip("/") or "/"
+        if path in self._exact:
+            return True
+        if not self._trie:
+            return False
+        return self._match(self._trie, path.strip("/").split("/"), 0)
+
+    def _match(self, node: Dict, segments, index: int) -> bool:
+        if node.get(self._PREFIX) and index < len(segments):
+            return True
+        if index == len(segments):
+            return self._END in node
+        child = node.get(segments[index])
+        if child is not None and self._match(child, segments, index + 1):
+            return True
+        child = node.get(self._PARAM)
+        return child is not None and self._match(child, segments, index + 1)
+
+
+class JWTMiddleware:
+    """
+    Pure ASGI middleware authenticating api requests by their bearer token, except whitelisted
+    routes, and gating the openapi documents behind security.enable_swagger.
+    """
+
+    def __init__(self, app: ASGIApp, security_config: SecurityConfig, api_version: str):
+        """
+        Args:
+            app: The wrapped ASGI application.
+            security_config: The security section of the config.
+            api_version: The api prefix, e.g. /v1.
+        """
+        self.app = app
+        self.security = security_config
+        self.api_version = api_version
+        # Compiled once, both lookups are independent of the number of routes
+        self.api_routes = RouteMatcher([f"{api_version}/*"])
+        self.white_list_routes = RouteMatcher(security_config.white_list_routes.split(","))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.security.enable:
+            await self.app(scope, receive, send)
+            return
+        response = self.authenticate(scope)
+        if response is None:
+            await self.app(scope, receive, send)
         else:
+            await response(scope, receive, send)
+
+    def authenticate(self, scope: Scope):
+        """
+        Check the request, storing the verified token claims on the request state.
+
+        Returns:
+            The rejection response, or None to let the request through.
+        """
+        media_type_json = ".json"
+        path = scope["path"]
+        if not self.api_routes.match(path) or path.endswith(media_type_json):
+            if self.security.enable_swagger:
+                return None
             return JSONResponse(
                 status_code=http.HTTPStatus.FORBIDDEN,
-                content={"detail": "The documentation isn't ready yet."},
+                content={"detail": "Document not enabled"},
             )
-    white_list_routes = [router.strip() for router in configs.white_list_routes.split(",")]
-    request_url_path = configs.api_version + raw_url_path.split(configs.api_version)[1]
-    if request_url_path in white_list_routes:
-        return await call_next(request)
+        if self.white_list_routes.match(path):
+            return None
 
-    auth_header = request.headers.get("Authorization")
-    if auth_header:
+        auth_header = Headers(scope=scope).get(ConstantCode.AUTH_KEY)
+        if not auth_header:
+            return JSONResponse(
+                status_code=http.HTTPStatus.UNAUTHORIZED,
+                content={"detail": "Missing Authentication header"},
+            )
         try:
             token = auth_header.split(" ")[-1]
-            await is_valid_token(token)
-        except JWTError as e:
+            claims = verify_token(token)
+        except Exception as e:
             logger.error(f"{e}")
             return JSONResponse(
                 status_code=http.HTTPStatus.UNAUTHORIZED,
                 content={"detail": "Invalid token or expired token"},
             )
-
-    else:
-        return JSONResponse(
-            status_code=401,
-            content={"detail": "Missing Authentication token"},
-        )
-
-    return await call_next(request)
+        # Reused by the get_current_user dependency so the token is verified once per request
+        state = scope.setdefault("state", {})
+        state["token_claims"] = claims
+        state["user_id"] = claims["sub"]
+        # The logical database of the request, resolved by the session middleware
+        if claims.get("database") is not None:
+            state["database"] = claims["database"]
+        return None
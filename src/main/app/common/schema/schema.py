@@ -1,7 +1,11 @@
 """Common schema"""
 
+from typing import Optional
+
 from pydantic import BaseModel
 
+from src.main.app.common.enums.enum import CountStrategy
+
 
 class Token(BaseModel):
     """
@@ -31,3 +35,4 @@ class BasePage(BaseModel):
     page: int = 1
     size: int = 10
     count: bool = False
+    count_strategy: Optional[CountStrategy] = None
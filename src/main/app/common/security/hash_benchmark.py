@@ -0,0 +1,62 @@
+"""Measure password verify time per hash scheme and cost on this host, to tune the security config
+
+Usage: python -m src.main.app.common.security.hash_benchmark [--iterations N] [--schemes bcrypt,argon2]
+"""
+
+import argparse
+import time
+from typing import Dict, List
+
+from passlib.exc import MissingBackendError
+
+from src.main.app.common.security.security import build_pwd_context
+
+# Cost settings tried for every scheme, keyed the way CryptContext expects them
+PROFILES: Dict[str, List[Dict]] = {
+    "bcrypt": [{"bcrypt__rounds": rounds} for rounds in (10, 11, 12, 13)],
+    "argon2": [
+        {"argon2__time_cost": time_cost, "argon2__memory_cost": memory_cost, "argon2__parallelism": parallelism}
+        for time_cost, memory_cost, parallelism in ((1, 47104, 1), (2, 19456, 1), (3, 12288, 1), (2, 65536, 4))
+    ],
+}
+
+
+def benchmark(scheme: str, settings: Dict, iterations: int) -> float:
+    """
+    Average verify time of one scheme and cost profile.
+
+    Args:
+        scheme: The passlib scheme name.
+        settings: The CryptContext cost settings.
+        iterations: Number of verify calls to average over.
+
+    Returns:
+        float: Milliseconds per verify.
+    """
+    context = build_pwd_context([scheme], **settings)
+    hashed = context.hash("benchmark-password")
+    start = time.perf_counter()
+    for _ in range(iterations):
+        context.verify("benchmark-password", hashed)
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--schemes", default=",".join(PROFILES))
+    args = parser.parse_args(argv)
+    for scheme in args.schemes.split(","):
+        scheme = scheme.strip()
+        for settings in PROFILES.get(scheme, [{}]):
+            profile = ", ".join(f"{key.split('__')[1]}={value}" for key, value in settings.items())
+            try:
+                elapsed = benchmark(scheme, settings, args.iterations)
+            except MissingBackendError:
+                print(f"{scheme:<8} backend not installed, skipped")
+                break
+            print(f"{scheme:<8} {profile:<50} {elapsed:8.1f} ms/verify")
+
+
+if __name__ == "__main__":
+    main()
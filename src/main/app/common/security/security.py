@@ -1,15 +1,17 @@
 """Open OAuth2PasswordBearer and provide current user info"""
 
+import asyncio
 import http
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import timedelta, datetime
-from typing import Any, Union
+from typing import Any, List, Optional, Tuple, Union
 from typing import Callable
 
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
-from jose import ExpiredSignatureError
 from jose import jwt
-from multipart.exceptions import DecodeError
+from jwt import ExpiredSignatureError, InvalidTokenError
 from passlib.context import CryptContext
 from starlette import status
 from starlette.responses import JSONResponse
@@ -17,6 +19,7 @@ from starlette.responses import JSONResponse
 from src.main.app.common.config.config_manager import load_config
 
 from src.main.app.common.schema.schema import CurrentUser
+from src.main.app.common.util.security_util import verify_token
 
 security_config = load_config().security
 server_config = load_config().server
@@ -30,16 +33,18 @@ def get_current_user() -> Callable[[], CurrentUser]:
     """
 
     async def current_user(
+        request: Request,
         access_token: str = Depends(oauth2_scheme),
     ) -> CurrentUser:
         try:
-            payload = await get_payload(access_token)
+            # Claims already verified by jwt_middleware, or the shared token cache
+            payload = getattr(request.state, "token_claims", None) or verify_token(access_token)
         except ExpiredSignatureError:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Your token has expired. Please log in again.",
             )
-        except DecodeError:
+        except InvalidTokenError:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Error when decoding the token. Please check your request.",
@@ -51,7 +56,42 @@ def get_current_user() -> Callable[[], CurrentUser]:
     return current_user
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def build_pwd_context(schemes: List[str] = None, **settings) -> CryptContext:
+    """
+    Build the password context from the security config, the first scheme is the default
+    one and every other scheme, or a stale cost factor, is reported by needs_update
+    :param schemes: hash schemes overriding security.hash_schemes
+    :param settings: cost settings overriding the security config, e.g. bcrypt__rounds=10
+    :return: CryptContext instance
+    """
+    schemes = schemes or [scheme.strip() for scheme in security_config.hash_schemes.split(",") if scheme.strip()]
+    options = {"bcrypt__rounds": security_config.bcrypt_rounds}
+    if "argon2" in schemes:
+        options.update(
+            argon2__time_cost=security_config.argon2_time_cost,
+            argon2__memory_cost=security_config.argon2_memory_cost,
+            argon2__parallelism=security_config.argon2_parallelism,
+        )
+    options.update(settings)
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
+
+
+pwd_context = build_pwd_context()
+
+
+def check_hash_backends(context: CryptContext = None) -> None:
+    """
+    Fail on startup rather than at the first login when a configured hash scheme has no
+    backend installed, e.g. argon2 without the argon2 extra
+    :param context: the password context to check, pwd_context by default
+    """
+    context = context or pwd_context
+    for scheme in context.schemes():
+        handler = context.handler(scheme)
+        if hasattr(handler, "has_backend") and not handler.has_backend():
+            raise ImportError(
+                f"password hash scheme '{scheme}' has no backend installed, argon2 requires the argon2-cffi package"
+            )
 
 
 async def create_token(subject: Union[str, Any], expires_delta: timedelta = None, token_type: str = None) -> str:
@@ -64,13 +104,124 @@ async def create_token(subject: Union[str, Any], expires_delta: timedelta = None
     return encoded_jwt
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    match: bool = pwd_context.verify(plain_password, hashed_password)
+class HashMetrics:
+    """
+    Queue depth of the password hash executor
+    """
+
+    def __init__(self):
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.max_waiting = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "waiting": self.waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "max_waiting": self.max_waiting,
+        }
+
+
+hash_metrics = HashMetrics()
+_hash_executor: Optional[Executor] = None
+# The limiter and the event loop it serves, an asyncio.Semaphore is bound to the first loop that waits on it
+_hash_limiter: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+_dummy_hash: Optional[str] = None
+
+
+def _hash_workers() -> int:
+    return security_config.hash_workers or os.cpu_count()
+
+
+def get_hash_executor() -> Executor:
+    """
+    Acquire the executor running bcrypt off the event loop, a thread or process pool
+    depending on security.hash_executor
+    :return: Executor instance
+    """
+    global _hash_executor
+    if _hash_executor is None:
+        workers = _hash_workers()
+        if security_config.hash_executor == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            _hash_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+    return _hash_executor
+
+
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+async def _run_hash(func: Callable, *args) -> Any:
+    """
+    Run a hash function on the executor, at most security.hash_concurrency at a time so a
+    burst queues on the limiter instead of piling up inside the pool
+    """
+    global _hash_limiter
+    loop = asyncio.get_running_loop()
+    if _hash_limiter is None or _hash_limiter[0] is not loop:
+        _hash_limiter = (loop, asyncio.Semaphore(security_config.hash_concurrency or _hash_workers()))
+    limiter = _hash_limiter[1]
+    hash_metrics.waiting += 1
+    hash_metrics.max_waiting = max(hash_metrics.max_waiting, hash_metrics.waiting)
+    try:
+        await limiter.acquire()
+    finally:
+        hash_metrics.waiting -= 1
+    hash_metrics.running += 1
+    try:
+        return await loop.run_in_executor(get_hash_executor(), func, *args)
+    finally:
+        hash_metrics.running -= 1
+        hash_metrics.completed += 1
+        limiter.release()
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    match: bool = await _run_hash(_verify_password, plain_password, hashed_password)
     return match
 
 
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and, when its hash uses a deprecated scheme or cost, rehash it
+    with the current profile in the same executor call
+    :return: whether the password matches, and the new hash to persist or None
+    """
+    return await _run_hash(_verify_and_update_password, plain_password, hashed_password)
+
+
+async def verify_dummy_password(plain_password: str) -> bool:
+    """
+    Spend the same verify work as a real user on an unknown username, always False
+    """
+    global _dummy_hash
+    if not security_config.dummy_verify:
+        return False
+    if _dummy_hash is None:
+        _dummy_hash = await get_password_hash(os.urandom(16).hex())
+    await verify_password(plain_password, _dummy_hash)
+    return False
+
+
 async def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return await _run_hash(_hash_password, password)
+
+
+async def get_password_hashes(passwords: List[str]) -> List[str]:
+    """Hash a batch of passwords, fanned out across the workers of the hash executor"""
+    return list(await asyncio.gather(*(_run_hash(_hash_password, password) for password in passwords)))
 
 
 async def get_payload(token: str):
@@ -1,12 +1,17 @@
 """Common service impl"""
 
-from typing import Any, TypeVar, List, Generic, Tuple, Union, Dict
+from typing import Any, TypeVar, List, Generic, Tuple, Union, Dict, Optional, Type, AsyncIterator
 
-from src.main.app.common.enums.enum import ResponseCode
+from pydantic import BaseModel
+from starlette.responses import StreamingResponse
+
+from src.main.app.common.enums.enum import ResponseCode, ExportFormat
 from src.main.app.common.exception.exception import SystemException
 from src.main.app.common.mapper.impl.mapper_base_impl import SqlModelMapper
 from src.main.app.common.mapper.model_base import ModelBase
 from src.main.app.common.service.service_base import ServiceBase
+from src.main.app.common.util.excel import export_excel_stream
+from src.main.app.common.util.export_util import export_stream
 
 T = TypeVar("T", bound=ModelBase)
 M = TypeVar("M", bound=SqlModelMapper)
@@ -46,6 +51,49 @@ class ServiceBaseImpl(Generic[M, T], ServiceBase[T]):
             current=page, pageSize=size, order_by=order_by, sort_order=sort_order, **kwargs
         )
 
+    async def retrieve_count(
+        self, *, count_strategy: Optional[str] = None, fan_out: bool = False, **kwargs
+    ) -> Tuple[int, bool]:
+        return await self.mapper.count(count_strategy=count_strategy, fan_out=fan_out, **kwargs)
+
+    async def retrieve_cursor_data(
+        self, *, size: int, cursor: str, order_by: str, sort_order: str, **kwargs
+    ) -> Tuple[
+        List[T],
+        Optional[str],
+    ]:
+        records, _ = await self.mapper.select_by_ordered_page(
+            pageSize=size, count=False, order_by=order_by, sort_order=sort_order, cursor=cursor or "", **kwargs
+        )
+        next_cursor = None
+        if len(records) == size:
+            next_cursor = self.mapper.build_cursor(record=records[-1], order_by=order_by)
+        return records, next_cursor
+
+    async def export_data(
+        self,
+        *,
+        schema: Type[BaseModel],
+        file_name: str,
+        export_format: ExportFormat = ExportFormat.xlsx,
+        compress: bool = False,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        **kwargs,
+    ) -> StreamingResponse:
+        # One pass over a server-side cursor in a single consistent transaction, whatever the size
+        if export_format == ExportFormat.xlsx:
+            batches = self.mapper.select_stream(offset=offset, limit=limit, snapshot=True, **kwargs)
+            return await export_excel_stream(schema=schema, file_name=file_name, batches=batches)
+        batches = self._fan_out_stream(offset=offset, limit=limit, snapshot=True, **kwargs)
+        return export_stream(schema, file_name, batches, export_format, compress)
+
+    async def _fan_out_stream(self, **kwargs) -> AsyncIterator[List[T]]:
+        # Rows are read on a borrowed session, on a replica when configured, while the body streams
+        async with self.mapper.db.fan_out() as db_session:
+            async for batch in self.mapper.select_stream(db_session=db_session, **kwargs):
+                yield batch
+
     async def modify_by_id(self, *, data: T) -> None:
         affect_row: int = await self.mapper.update_by_id(record=data)
         if affect_row != 1:
@@ -64,6 +112,15 @@ class ServiceBaseImpl(Generic[M, T], ServiceBase[T]):
                 ResponseCode.PARAMETER_ERROR.msg,
             )
 
+    async def batch_modify_rows(self, *, data: List[Dict], db_session: Any = None) -> None:
+        rowcounts: List[int] = await self.mapper.batch_update_rows(records=data, db_session=db_session)
+        # Records repeating an id update a single row
+        if len({record["id"] for record in data}) != sum(rowcounts):
+            raise SystemException(
+                ResponseCode.PARAMETER_ERROR.code,
+                ResponseCode.PARAMETER_ERROR.msg,
+            )
+
     async def remove_by_id(self, *, id: Union[int, str]) -> None:
         affect_row: int = await self.mapper.delete_by_id(id=id)
         if affect_row != 1:
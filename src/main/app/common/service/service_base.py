@@ -1,9 +1,13 @@
 """Abstract Service used in the project"""
 
 from abc import ABC, abstractmethod
-from typing import Any, List, TypeVar, Generic, Tuple, Union, Dict
+from typing import Any, List, TypeVar, Generic, Tuple, Union, Dict, Optional, Type
 
+from pydantic import BaseModel
 from sqlmodel import SQLModel
+from starlette.responses import StreamingResponse
+
+from src.main.app.common.enums.enum import ExportFormat
 
 T = TypeVar("T", bound=SQLModel)
 
@@ -37,6 +41,32 @@ class ServiceBase(Generic[T], ABC):
         int,
     ]: ...
 
+    @abstractmethod
+    async def retrieve_count(
+        self, *, count_strategy: Optional[str] = None, fan_out: bool = False, **kwargs
+    ) -> Tuple[int, bool]: ...
+
+    @abstractmethod
+    async def retrieve_cursor_data(
+        self, *, size: int, cursor: str, order_by: str, sort_order: str, **kwargs
+    ) -> Tuple[
+        List[T],
+        Optional[str],
+    ]: ...
+
+    @abstractmethod
+    async def export_data(
+        self,
+        *,
+        schema: Type[BaseModel],
+        file_name: str,
+        export_format: ExportFormat = ExportFormat.xlsx,
+        compress: bool = False,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        **kwargs,
+    ) -> StreamingResponse: ...
+
     @abstractmethod
     async def modify_by_id(self, *, data: T) -> None: ...
 
@@ -45,6 +75,9 @@ class ServiceBase(Generic[T], ABC):
         self, *, ids: Union[List[int], List[str]], data: Dict, db_session: Any = None
     ) -> None: ...
 
+    @abstractmethod
+    async def batch_modify_rows(self, *, data: List[Dict], db_session: Any = None) -> None: ...
+
     @abstractmethod
     async def remove_by_id(self, *, id: Union[int, str]) -> None: ...
 
@@ -1,34 +1,140 @@
+import asyncio
+import time
 from threading import Lock
-from typing import Dict
+from typing import Dict, List, Optional
 
+from loguru import logger
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
 from src.main.app.common.config.config_manager import load_config
 
+DEFAULT_DATABASE = "default"
 
-# Global engine cache with thread safety
+# Global engine cache with thread safety, keyed by logical database name
 _engine_map: Dict[str, AsyncEngine] = {}
+# Read replicas of the default database, apart so a requested database name never resolves to one
+_replica_map: Dict[str, AsyncEngine] = {}
+_last_used: Dict[str, float] = {}
 _lock = Lock()
+_last_sweep = time.monotonic()
+_sweep_task: Optional[asyncio.Task] = None
 
 async_engine: AsyncEngine
 
 
-def get_async_engine():
-    global async_engine
+def _create_engine(url: str) -> AsyncEngine:
     database_config = load_config().database
-    if database_config.dialect.lower() == "sqlite":
-        async_engine = create_async_engine(
-            url=database_config.url,
-            echo=database_config.echo_sql,
-            pool_recycle=database_config.pool_recycle,
-            pool_pre_ping=True,
-        )
-    else:
-        async_engine = create_async_engine(
-            url=database_config.url,
+    if make_url(url).get_backend_name() == "sqlite":
+        return create_async_engine(
+            url=url,
             echo=database_config.echo_sql,
-            pool_size=database_config.pool_size,
-            max_overflow=database_config.max_overflow,
             pool_recycle=database_config.pool_recycle,
             pool_pre_ping=True,
         )
+    return create_async_engine(
+        url=url,
+        echo=database_config.echo_sql,
+        pool_size=database_config.pool_size,
+        max_overflow=database_config.max_overflow,
+        pool_recycle=database_config.pool_recycle,
+        pool_pre_ping=True,
+    )
+
+
+def get_engine(name: str = DEFAULT_DATABASE) -> AsyncEngine:
+    """
+    Return the engine of a logical database, created on first use and reused afterwards.
+
+    Args:
+        name: 'default' for database.url, or a key of database.databases.
+
+    Raises:
+        KeyError: The name is not configured.
+    """
+    engine = _engine_map.get(name)
+    if engine is None:
+        with _lock:
+            engine = _engine_map.get(name)
+            if engine is None:
+                if name == DEFAULT_DATABASE:
+                    url = load_config().database.url
+                else:
+                    url = (load_config().database.databases or {})[name]
+                engine = _create_engine(url)
+                _engine_map[name] = engine
+    _last_used[name] = time.monotonic()
+    _schedule_idle_sweep()
+    return engine
+
+
+def get_async_engine():
+    global async_engine
+    async_engine = get_engine()
     return async_engine
+
+
+def get_replica_engines() -> List[AsyncEngine]:
+    """
+    Engines of the read replicas listed in database.replica_urls, registered as replica_0, replica_1...
+    They serve every read of the default database, so like it they are never disposed when idle.
+    """
+    with _lock:
+        if not _replica_map:
+            replica_urls = [url.strip() for url in load_config().database.replica_urls.split(",") if url.strip()]
+            for index, url in enumerate(replica_urls):
+                _replica_map[f"replica_{index}"] = _create_engine(url)
+        return list(_replica_map.values())
+
+
+async def dispose_idle_engines(idle_timeout: int) -> List[str]:
+    """
+    Dispose the engines, other than the default one, unused for idle_timeout seconds and
+    with no connection checked out. A later get_engine recreates them.
+
+    Returns:
+        The names of the disposed engines.
+    """
+    now = time.monotonic()
+    idle = []
+    with _lock:
+        for name, engine in list(_engine_map.items()):
+            if name == DEFAULT_DATABASE or now - _last_used.get(name, now) < idle_timeout:
+                continue
+            if getattr(engine.pool, "checkedout", lambda: 0)():
+                continue
+            idle.append((name, _engine_map.pop(name)))
+            _last_used.pop(name, None)
+    for name, engine in idle:
+        logger.info(f"Dispose idle engine {name}")
+        await engine.dispose()
+    return [name for name, _ in idle]
+
+
+def _schedule_idle_sweep() -> None:
+    global _last_sweep, _sweep_task
+    idle_timeout = load_config().database.engine_idle_timeout
+    if not idle_timeout or time.monotonic() - _last_sweep < idle_timeout:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    _last_sweep = time.monotonic()
+    _sweep_task = loop.create_task(dispose_idle_engines(idle_timeout))
+
+
+def pool_stats() -> Dict[str, Dict]:
+    """
+    Connection pool usage of every registered engine, read replicas included.
+    """
+    stats = {}
+    for name, engine in [*_engine_map.items(), *_replica_map.items()]:
+        pool = engine.pool
+        stats[name] = {
+            "pool": type(pool).__name__,
+            "size": getattr(pool, "size", lambda: None)(),
+            "checked_in": getattr(pool, "checkedin", lambda: None)(),
+            "checked_out": getattr(pool, "checkedout", lambda: None)(),
+            "overflow": getattr(pool, "overflow", lambda: None)(),
+        }
+    return stats
@@ -1,20 +1,24 @@
 """Session proxy used in the project"""
 
+from contextlib import asynccontextmanager
 from contextvars import ContextVar
-from typing import Dict, Optional, Union
+from typing import AsyncIterator, Callable, Dict, Optional, Sequence, Union
 
 from sqlalchemy.engine import Engine
 from sqlalchemy.engine.url import URL
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel.ext.asyncio.session import AsyncSession
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.requests import Request
-from starlette.types import ASGIApp
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from src.main.app.common.enums.enum import ResponseCode
 from src.main.app.common.exception.exception import (
     SessionNotInitialisedException,
     MissingSessionException,
 )
+from src.main.app.common.mapper.entity_cache import flush_invalidations
+from src.main.app.common.session.replica_router import ReplicaRouter
 
 try:
     from sqlalchemy.ext.asyncio import async_sessionmaker
@@ -22,14 +26,45 @@ except ImportError:
     from sqlalchemy.orm import sessionmaker as async_sessionmaker
 
 
+class _LazySession:
+    """
+    Holder of the session of one DBSession scope, created on first access. The holder itself is
+    what the context var carries, so a session first created inside a child task is still seen,
+    committed and closed by the scope that owns it. Reads go to read_session until the scope
+    touches the primary session, after which it stays pinned to the primary to read its writes.
+    """
+
+    __slots__ = ("session_args", "session", "read_session", "pinned", "database")
+
+    def __init__(self, session_args: Dict, bind: Optional[Engine] = None, database: Optional[str] = None):
+        # A bind other than the default engine has no replicas, reads stay on its session
+        self.session_args = {**session_args, "bind": bind} if bind is not None else session_args
+        self.session: Optional[AsyncSession] = None
+        self.read_session: Optional[AsyncSession] = None
+        self.pinned = bind is not None
+        self.database = database
+
+
 def create_middleware_and_session_proxy():
     _Session: Optional[async_sessionmaker] = None
+    _router: Optional[ReplicaRouter] = None
     # Usage of context vars inside closures is not recommended, since they are not properly
     # garbage collected, but in our use case context var is created on program startup and
     # is used throughout the whole its lifecycle.
-    _session: ContextVar[Optional[AsyncSession]] = ContextVar("_session", default=None)
+    _session: ContextVar[Optional[_LazySession]] = ContextVar("_session", default=None)
+
+    class SQLAlchemyMiddleware:
+        """
+        Pure ASGI middleware binding a DBSession to each http request. The session is committed
+        right before the response starts, so a failed commit still turns into an error response,
+        and again on exit for work done while streaming the body, or rolled back on error. The
+        entity cache entries a commit invalidates are gone before the response starts.
+        Requests that never touch db.session never open one, and paths under skip_paths get
+        no session scope at all. With replica_engines, db.read_session is served by a replica.
+        A request naming a logical database in database_header, or in the 'database' entry of its
+        state, gets a session bound to engine_resolver(name).
+        """
 
-    class SQLAlchemyMiddleware(BaseHTTPMiddleware):
         def __init__(
             self,
             app: ASGIApp,
@@ -38,9 +73,18 @@ def create_middleware_and_session_proxy():
             engine_args: Dict = None,
             session_args: Dict = None,
             commit_on_exit: bool = True,
+            skip_paths: Sequence[str] = (),
+            replica_engines: Sequence[Engine] = (),
+            replica_selection: str = "round_robin",
+            replica_health_interval: int = 30,
+            engine_resolver: Optional[Callable[[str], Engine]] = None,
+            database_header: Optional[str] = None,
         ):
-            super().__init__(app)
+            self.app = app
             self.commit_on_exit = commit_on_exit
+            self.skip_paths = tuple(skip_paths)
+            self.engine_resolver = engine_resolver
+            self.database_header = database_header
             engine_args = engine_args or {}
             session_args = session_args or {}
 
@@ -51,12 +95,47 @@ def create_middleware_and_session_proxy():
             else:
                 engine = custom_engine
 
-            nonlocal _Session
+            nonlocal _Session, _router
             _Session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, **session_args)
+            _router = (
+                ReplicaRouter(replica_engines, replica_selection, replica_health_interval) if replica_engines else None
+            )
+
+        async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+            if scope["type"] != "http" or scope["path"].startswith(self.skip_paths):
+                await self.app(scope, receive, send)
+                return
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start" and self.commit_on_exit:
+                    holder = _session.get()
+                    if holder.session is not None:
+                        await holder.session.commit()
+                        await flush_invalidations(holder.session)
+                await send(message)
 
-        async def dispatch(self, request: Request, call_next: RequestResponseEndpoint):
-            async with DBSession(commit_on_exit=self.commit_on_exit):
-                return await call_next(request)
+            bind = None
+            database = scope.get("state", {}).get("database")
+            if database is None and self.database_header:
+                database = Headers(scope=scope).get(self.database_header)
+            if database is not None and self.engine_resolver is not None:
+                try:
+                    bind = self.engine_resolver(database)
+                except KeyError:
+                    response = JSONResponse(
+                        {
+                            "code": ResponseCode.DB_UNKNOWN_ERROR.code,
+                            "msg": f"{ResponseCode.DB_UNKNOWN_ERROR.msg}: {database}",
+                        },
+                        status_code=ResponseCode.DB_UNKNOWN_ERROR.code,
+                    )
+                    await response(scope, receive, send)
+                    return
+
+            async with DBSession(
+                commit_on_exit=self.commit_on_exit, bind=bind, database=database if bind is not None else None
+            ):
+                await self.app(scope, receive, send_wrapper)
 
     class DBSessionMeta(type):
         @property
@@ -65,37 +144,120 @@ def create_middleware_and_session_proxy():
             if _Session is None:
                 raise SessionNotInitialisedException
 
-            session = _session.get()
-            if session is None:
+            holder = _session.get()
+            if holder is None:
                 raise MissingSessionException
+            if holder.session is None:
+                holder.session = _Session(**holder.session_args)
+            holder.pinned = True
+            return holder.session
 
-            return session
+        @property
+        def read_session(self) -> AsyncSession:
+            """
+            Return the session for read-only queries, on a replica unless none is configured or
+            healthy, or the current context already used the primary session.
+            """
+            if _Session is None:
+                raise SessionNotInitialisedException
+
+            holder = _session.get()
+            if holder is None:
+                raise MissingSessionException
+            if _router is None or holder.pinned:
+                return self.session
+            if holder.read_session is None:
+                engine = _router.pick()
+                if engine is None:
+                    return self.session
+                holder.read_session = _Session(bind=engine, **holder.session_args)
+            return holder.read_session
 
     class DBSession(metaclass=DBSessionMeta):
-        def __init__(self, session_args: Dict = None, commit_on_exit: bool = False):
+        def __init__(
+            self,
+            session_args: Dict = None,
+            commit_on_exit: bool = False,
+            bind: Optional[Engine] = None,
+            database: Optional[str] = None,
+        ):
             self.token = None
             self.session_args = session_args or {}
             self.commit_on_exit = commit_on_exit
+            self.bind = bind
+            self.database = database
 
         async def __aenter__(self):
             if not isinstance(_Session, async_sessionmaker):
                 raise SessionNotInitialisedException
 
-            self.token = _session.set(_Session(**self.session_args))  # entity: ignore
+            self.token = _session.set(_LazySession(self.session_args, self.bind, self.database))
             return type(self)
 
         async def __aexit__(self, exc_type, exc_value, traceback):
-            session = _session.get()
+            holder = _session.get()
+            if holder.read_session is not None:
+                await holder.read_session.close()
+            session = holder.session
+            if session is None:
+                _session.reset(self.token)
+                return
 
             try:
                 if exc_type is not None:
                     await session.rollback()
                 elif self.commit_on_exit:  # Note: Changed this to elif to avoid commit after rollback
                     await session.commit()
+                    await flush_invalidations(session)
             finally:
                 await session.close()
                 _session.reset(self.token)
 
+        @staticmethod
+        def pin_primary() -> None:
+            """
+            Send the remaining reads of the current context to the primary.
+            """
+            holder = _session.get()
+            if holder is not None:
+                holder.pinned = True
+
+        @staticmethod
+        def current_session() -> Optional[AsyncSession]:
+            """
+            Return the primary session of the current context if it was already created, without creating one.
+            """
+            holder = _session.get()
+            return holder.session if holder is not None else None
+
+        @staticmethod
+        def current_database() -> Optional[str]:
+            """
+            Return the logical database the current context is bound to, None for the default one.
+            """
+            holder = _session.get()
+            return holder.database if holder is not None else None
+
+        @staticmethod
+        @asynccontextmanager
+        async def fan_out() -> AsyncIterator[AsyncSession]:
+            """
+            Borrow an extra session on its own pooled connection, for read-only queries running
+            concurrently with the request session. It is never committed and its connection
+            returns to the pool on exit. It reads from a replica when the context is not pinned.
+            """
+            if not isinstance(_Session, async_sessionmaker):
+                raise SessionNotInitialisedException
+
+            holder = _session.get()
+            session_args = holder.session_args if holder is not None else {}
+            if _router is not None and (holder is None or not holder.pinned):
+                engine = _router.pick()
+                if engine is not None:
+                    session_args = {**session_args, "bind": engine}
+            async with _Session(**session_args) as session:
+                yield session
+
     return SQLAlchemyMiddleware, DBSession
 
 
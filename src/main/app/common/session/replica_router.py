@@ -0,0 +1,75 @@
+"""Read replica selection with periodic health checks"""
+
+import asyncio
+import itertools
+import time
+from typing import List, Optional, Sequence
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class ReplicaRouter:
+    """
+    Picks the replica engine serving a read-only session, round-robin or by the fewest checked
+    out connections, skipping replicas whose last health check failed.
+    """
+
+    def __init__(self, engines: Sequence[AsyncEngine], selection: str = "round_robin", health_interval: int = 30):
+        """
+        Args:
+            engines: The replica engines.
+            selection: 'round_robin' or 'least_connections'.
+            health_interval: Seconds between health checks of the replicas, 0 disables them.
+        """
+        self.engines: List[AsyncEngine] = list(engines)
+        self.selection = selection
+        self.health_interval = health_interval
+        self.healthy = {id(engine): True for engine in self.engines}
+        self._cycle = itertools.cycle(self.engines)
+        self._last_check = time.monotonic()
+        self._check_task: Optional[asyncio.Task] = None
+
+    def pick(self) -> Optional[AsyncEngine]:
+        """
+        Returns:
+            The replica engine to read from, or None to read from the primary.
+        """
+        self._schedule_health_check()
+        candidates = [engine for engine in self.engines if self.healthy[id(engine)]]
+        if not candidates:
+            return None
+        if self.selection == "least_connections":
+            return min(candidates, key=lambda engine: getattr(engine.pool, "checkedout", lambda: 0)())
+        for engine in self._cycle:
+            if self.healthy[id(engine)]:
+                return engine
+
+    async def check_health(self) -> None:
+        """
+        Ping every replica, marking the ones failing as unhealthy until the next check.
+        """
+        results = await asyncio.gather(*(self._ping(engine) for engine in self.engines))
+        for engine, healthy in zip(self.engines, results):
+            if self.healthy[id(engine)] != healthy:
+                logger.warning(f"Replica {engine.url.render_as_string()} is {'up' if healthy else 'down'}")
+            self.healthy[id(engine)] = healthy
+
+    def _schedule_health_check(self) -> None:
+        if not self.health_interval or time.monotonic() - self._last_check < self.health_interval:
+            return
+        if self._check_task is not None and not self._check_task.done():
+            return
+        self._last_check = time.monotonic()
+        self._check_task = asyncio.get_running_loop().create_task(self.check_health())
+
+    @staticmethod
+    async def _ping(engine: AsyncEngine) -> bool:
+        try:
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.error(f"{e}")
+            return False
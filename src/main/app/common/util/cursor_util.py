@@ -0,0 +1,55 @@
+"""Cursor util to encode and decode keyset pagination cursors"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, Tuple
+
+from src.main.app.common.enums.enum import ResponseCode
+from src.main.app.common.exception.exception import SystemException
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(order_value: Any, id: Any) -> str:
+    """
+    Encode the last order_by value and id of a page into an opaque cursor.
+
+    Args:
+        order_value: Value of the order_by column of the last record.
+        id: ID of the last record, used as tiebreaker.
+
+    Returns:
+        str: Url safe cursor string.
+    """
+    payload = json.dumps([_to_json(order_value), id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, python_type: type = None) -> Tuple[Any, Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: The cursor string.
+        python_type: Python type of the order_by column, used to restore date values.
+
+    Returns:
+        Tuple[Any, Any]: The order_by value and id of the last record.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        order_value, id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if order_value is not None and python_type in (datetime, date):
+            order_value = python_type.fromisoformat(order_value)
+    except (binascii.Error, UnicodeError, TypeError, ValueError):
+        raise SystemException(
+            ResponseCode.INVALID_CURSOR_ERROR.code,
+            ResponseCode.INVALID_CURSOR_ERROR.msg,
+        )
+    return order_value, id
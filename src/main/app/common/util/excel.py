@@ -1,16 +1,25 @@
 """Excel util"""
 
 import io
+import tempfile
 from datetime import datetime
-from typing import List, TypeVar, Type
+from typing import Any, AsyncIterator, IO, Iterator, List, Sequence, TypeVar, Type
 
 import pandas as pd
+import xlsxwriter
 from loguru import logger
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import StreamingResponse
 
 T = TypeVar("T", bound=BaseModel)
 
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# Size kept in memory before the export file rolls over to disk
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+# Size of each chunk sent to the client
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 async def export_template(schema: Type[T], file_name: str, records: List[T] = None) -> StreamingResponse:
     """
@@ -30,9 +39,59 @@ async def export_template(schema: Type[T], file_name: str, records: List[T] = No
         excel_writer._save()
         stream.seek(0)
         return StreamingResponse(
-            io.BytesIO(stream.getvalue()),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            stream,
+            media_type=XLSX_MEDIA_TYPE,
             headers={"Content-Disposition": f"attachment; filename={filename}"},
         )
     except Exception as e:
         logger.error(f"{e}")
+
+
+async def export_excel_stream(
+    schema: Type[T], file_name: str, batches: AsyncIterator[Sequence[Any]]
+) -> StreamingResponse:
+    """
+    Export records arriving in batches with xlsxwriter constant memory mode. Rows are written into
+    a spooled temp file as they arrive, then the file is streamed out in chunks.
+
+    Args:
+        schema: Schema whose fields are the exported columns, read from each record by attribute.
+        file_name: File name for export.
+        batches: Async iterator of record batches, e.g. SqlModelMapper.select_stream.
+    """
+    field_names = list(schema.model_fields)
+    filename = f"{file_name}_{datetime.now().strftime('%Y%m%d%H%M%S')}.xlsx"
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        workbook = xlsxwriter.Workbook(spooled, {"constant_memory": True, "default_date_format": "yyyy-mm-dd hh:mm:ss"})
+        worksheet = workbook.add_worksheet()
+        worksheet.write_row(0, 0, field_names)
+        row = 1
+        async for records in batches:
+            await run_in_threadpool(_write_records, worksheet, row, field_names, records)
+            row += len(records)
+        await run_in_threadpool(workbook.close)
+        spooled.seek(0)
+    except Exception as e:
+        spooled.close()
+        logger.error(f"Failed to export Excel: {e}")
+        raise
+    return StreamingResponse(
+        _iter_file(spooled),
+        media_type=XLSX_MEDIA_TYPE,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+def _write_records(worksheet, first_row: int, field_names: List[str], records: Sequence[Any]) -> None:
+    for offset, record in enumerate(records):
+        worksheet.write_row(first_row + offset, 0, [getattr(record, field) for field in field_names])
+
+
+def _iter_file(file: IO[bytes]) -> Iterator[bytes]:
+    # Sync iterator, starlette reads it in the threadpool and it closes the file once sent
+    try:
+        while chunk := file.read(STREAM_CHUNK_SIZE):
+            yield chunk
+    finally:
+        file.close()
@@ -0,0 +1,98 @@
+"""Export util that encodes record batches as streamed CSV or NDJSON"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Any, AsyncIterator, List, Sequence, Type, TypeVar
+
+from pydantic import BaseModel
+from starlette.responses import StreamingResponse
+
+from src.main.app.common.enums.enum import ExportFormat
+
+T = TypeVar("T", bound=BaseModel)
+
+_MEDIA_TYPES = {
+    ExportFormat.csv: "text/csv; charset=utf-8",
+    ExportFormat.ndjson: "application/x-ndjson",
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+async def encode_csv(field_names: List[str], batches: AsyncIterator[Sequence[Any]]) -> AsyncIterator[bytes]:
+    """
+    Encode record batches as CSV, yielding the header then one chunk per batch.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(field_names)
+    yield buffer.getvalue().encode("utf-8")
+    async for records in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([getattr(record, field) for field in field_names] for record in records)
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def encode_ndjson(field_names: List[str], batches: AsyncIterator[Sequence[Any]]) -> AsyncIterator[bytes]:
+    """
+    Encode record batches as newline delimited JSON, one chunk per batch.
+    """
+    async for records in batches:
+        lines = (
+            json.dumps({field: getattr(record, field) for field in field_names}, default=_json_default)
+            for record in records
+        )
+        yield "".join(f"{line}\n" for line in lines).encode("utf-8")
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Compress a byte stream as gzip incrementally.
+    """
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(
+    schema: Type[T],
+    file_name: str,
+    batches: AsyncIterator[Sequence[Any]],
+    export_format: ExportFormat,
+    compress: bool = False,
+) -> StreamingResponse:
+    """
+    Stream records as CSV or NDJSON while the batches arrive, so the first byte does not wait for the whole result.
+
+    Args:
+        schema: Schema whose fields are the exported columns, read from each record by attribute.
+        file_name: File name for export.
+        batches: Async iterator of record batches, consumed while the response is sent.
+        export_format: ExportFormat.csv or ExportFormat.ndjson.
+        compress: Whether to gzip the stream.
+    """
+    field_names = list(schema.model_fields)
+    encoder = encode_csv if export_format == ExportFormat.csv else encode_ndjson
+    content = encoder(field_names, batches)
+    filename = f"{file_name}_{datetime.now().strftime('%Y%m%d%H%M%S')}.{export_format.value}"
+    media_type = _MEDIA_TYPES[export_format]
+    if compress:
+        content = gzip_stream(content)
+        filename = f"{filename}.gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
@@ -0,0 +1,65 @@
+"""Import util that reads uploaded Excel or CSV files in row batches"""
+
+import csv
+import io
+from typing import IO, Any, AsyncIterator, Dict, Iterator, List
+
+from fastapi import UploadFile
+from openpyxl import load_workbook
+from starlette.concurrency import iterate_in_threadpool
+
+
+def _iter_xlsx(file: IO[bytes], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        batch = []
+        for values in rows:
+            if all(value is None for value in values):
+                continue
+            batch.append({key: value for key, value in zip(header, values) if key is not None})
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        workbook.close()
+
+
+def _iter_csv(file: IO[bytes], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        batch = []
+        for row in csv.DictReader(text):
+            batch.append(row)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        # Leave the upload open, it is closed by its owner
+        text.detach()
+
+
+async def iter_import_batches(file: UploadFile, batch_size: int = 1000) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Iterate the rows of an uploaded .xlsx or .csv file in batches keyed by the header row.
+    The spooled upload is parsed in the threadpool (openpyxl read only mode for Excel),
+    so memory is bounded by the batch size whatever the file size.
+
+    Args:
+        file: The uploaded file, CSV when its name ends with .csv, Excel otherwise.
+        batch_size: Max number of rows per batch.
+    """
+    await file.seek(0)
+    if (file.filename or "").lower().endswith(".csv"):
+        batches = _iter_csv(file.file, batch_size)
+    else:
+        batches = _iter_xlsx(file.file, batch_size)
+    async for batch in iterate_in_threadpool(batches):
+        yield batch
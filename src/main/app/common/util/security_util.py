@@ -1,7 +1,11 @@
 """Open OAuth2PasswordBearer and provide current user info"""
 
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import timedelta, datetime
-from typing import Any, Union, Callable
+from typing import Any, Dict, Optional, Tuple, Union, Callable
 
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
@@ -17,6 +21,45 @@ from src.main.app.common.schema.schema import CurrentUser
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+class TokenCache:
+    """
+    Bounded LRU of verified token claims keyed by the token's sha256, each entry
+    dropped once the token's exp has passed
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, Tuple[float, Dict]] = OrderedDict()
+        # The sync dependencies run in the threadpool
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[Dict]:
+        key = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, token: str, claims: Dict) -> None:
+        exp = claims.get("exp")
+        if not self.max_size or exp is None:
+            return
+        key = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            self._entries[key] = (exp, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+token_cache = TokenCache(load_config().security.token_cache_size)
+
+
 def decode_token(token: str):
     config = load_config()
     """Decode JWT and return payload"""
@@ -24,9 +67,18 @@ def decode_token(token: str):
     return jwt.decode(token, key, algorithms=[config.security.algorithm])
 
 
+def verify_token(token: str) -> Dict:
+    """Return the claims of a token, decoding and verifying it only on a cache miss"""
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = decode_token(token)
+        token_cache.put(token, claims)
+    return claims
+
+
 def get_user_id(token: str) -> int:
     """Extract user ID from token"""
-    payload = decode_token(token)
+    payload = verify_token(token)
     return payload["sub"]
 
 
@@ -3,6 +3,9 @@
 from fastapi import APIRouter, Depends
 
 from src.main.app.common.cache.cache import get_cache_client, Cache
+from src.main.app.common.cache.tiered_cache import TieredCache
+from src.main.app.common.security.security import hash_metrics
+from src.main.app.common.session.db_engine import pool_stats
 from src.main.app.enums.system import SystemResponseCode
 from src.main.app.factory.service_factory import get_user_service
 from src.main.app.service.user_service import UserService
@@ -22,7 +25,11 @@ async def liveness():
 
 
 @probe_router.get("/readiness")
-async def readiness(user_id: int = 1, user_service: UserService = Depends(get_user_service)):
+async def readiness(
+    user_id: int = 1,
+    user_service: UserService = Depends(get_user_service),
+    cache_client: Cache = Depends(get_cache_client),
+):
     """
     Checks system and dependencies' readiness.
 
@@ -30,11 +37,12 @@ async def readiness(user_id: int = 1, user_service: UserService = Depends(get_us
         user_id (int, optional): ID for readiness check, defaults to 1.
 
         user_service (UserService, optional): Service for user-related operations.
+
+        cache_client (Cache, optional): The shared cache client.
     Returns:
         dict: Response with 'code' and 'msg' indicating readiness status.
     """
     try:
-        cache_client: Cache = await get_cache_client()
         cache_key = f"user:{user_id}"
         await cache_client.set(cache_key, "Ok")
         res = await cache_client.get(cache_key)
@@ -51,3 +59,37 @@ async def readiness(user_id: int = 1, user_service: UserService = Depends(get_us
         }
 
     return {"code": SystemResponseCode.SUCCESS.code, "msg": "Hello"}
+
+
+@probe_router.get("/hash")
+async def hash_pool():
+    """
+    Report the queue depth of the password hash executor.
+
+    Returns:
+        dict: Response with 'code' and 'data' holding the waiting, running and completed counts.
+    """
+    return {"code": SystemResponseCode.SUCCESS.code, "data": hash_metrics.snapshot()}
+
+
+@probe_router.get("/pool")
+async def pool():
+    """
+    Report the connection pool usage of every registered database engine.
+
+    Returns:
+        dict: Response with 'code' and 'data' keyed by logical database name.
+    """
+    return {"code": SystemResponseCode.SUCCESS.code, "data": pool_stats()}
+
+
+@probe_router.get("/cache")
+async def cache(cache_client: Cache = Depends(get_cache_client)):
+    """
+    Report the size and hit rate of the in-process cache tier.
+
+    Returns:
+        dict: Response with 'code' and 'data', empty when the local tier is disabled.
+    """
+    data = cache_client.local_stats() if isinstance(cache_client, TieredCache) else {}
+    return {"code": SystemResponseCode.SUCCESS.code, "data": data}
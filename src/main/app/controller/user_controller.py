@@ -1,12 +1,14 @@
 """User operation controller"""
 
+import asyncio
 from typing import List, Dict
 
-from fastapi import APIRouter, Depends, UploadFile
+from fastapi import APIRouter, Depends, UploadFile, Query
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi_pagination import Params
 from starlette.responses import StreamingResponse
 
+from src.main.app.common.enums.enum import ExportFormat
 from src.main.app.common.result import result
 from src.main.app.common.result.result import BaseResponse
 from src.main.app.common.schema.schema import Token, CurrentUser
@@ -21,6 +23,8 @@ from src.main.app.schema.user_schema import (
     LoginCmd,
     UpdateUserCmd,
     UserFilterParams,
+    UserCursorPage,
+    UserPage,
 )
 from src.main.app.service.user_service import UserService
 
@@ -148,15 +152,18 @@ async def import_user(
 
         current_user: Logged-in user performing the import.
     Returns:
-        Success result message
+        Success result message with the number of imported users
     """
-    await user_service.import_user(file=file)
-    return result.success()
+    imported: int = await user_service.import_user(file=file)
+    return result.success(data=imported)
 
 
 @user_router.get("/export")
 async def export_user(
     params: Params = Depends(),
+    export_format: ExportFormat = Query(ExportFormat.xlsx, alias="format"),
+    compress: bool = False,
+    export_all: bool = Query(False, alias="all"),
     current_user: CurrentUser = Depends(get_current_user()),
 ) -> StreamingResponse:
     """
@@ -165,12 +172,20 @@ async def export_user(
     Args:
         params: Filtering and format parameters for export.
 
+        export_format: xlsx, csv or ndjson, csv and ndjson are streamed as rows arrive.
+
+        compress: Whether to gzip csv or ndjson output.
+
+        export_all: Export all users in one pass instead of the requested page.
+
         current_user: Logged-in user requesting the export.
 
     Returns:
         StreamingResponse with user info
     """
-    return await user_service.export_user(params=params)
+    return await user_service.export_user(
+        params=params, export_format=export_format, compress=compress, export_all=export_all
+    )
 
 
 @user_router.post("/list")
@@ -179,7 +194,8 @@ async def list_user(
     current_user: CurrentUser = Depends(get_current_user),
 ) -> BaseResponse:
     """
-    List users with pagination.
+    List users with pagination. When cursor is given (empty for the first page) keyset
+    pagination is used and the cursor of the next page is returned with the records.
 
     Args:
         userFilterParams: param to filter user data
@@ -187,13 +203,36 @@ async def list_user(
         current_user: Logged-in user performing the operation.
 
     Returns:
-        BaseResponse with userQuery list.
-    """
-
-    records: List[UserQuery] = await user_service.retrieve_user(
+        BaseResponse with userQuery list, UserPage when count is requested, or UserCursorPage in cursor mode.
+    """
+    if userFilterParams.cursor is not None:
+        records, next_cursor = await user_service.retrieve_user_by_cursor(
+            size=userFilterParams.size,
+            cursor=userFilterParams.cursor,
+            order_by=userFilterParams.order_by,
+            sort_order=userFilterParams.sort_order,
+            filter_by=userFilterParams.filter_by,
+            like=userFilterParams.like,
+        )
+        return BaseResponse(data=UserCursorPage(records=records, next_cursor=next_cursor))
+
+    records_task = user_service.retrieve_user(
         page=userFilterParams.page,
         size=userFilterParams.size,
         filter_by=userFilterParams.filter_by,
         like=userFilterParams.like,
     )
+    if userFilterParams.count:
+        # Listing is read-only, so the count runs on its own pooled session alongside the page query
+        records, (total, total_exact) = await asyncio.gather(
+            records_task,
+            user_service.retrieve_count(
+                count_strategy=userFilterParams.count_strategy,
+                fan_out=True,
+                filter_by=userFilterParams.filter_by,
+                like=userFilterParams.like,
+            ),
+        )
+        return BaseResponse(data=UserPage(records=records, total=total, total_exact=total_exact))
+    records: List[UserQuery] = await records_task
     return BaseResponse(data=records)
@@ -9,7 +9,7 @@ from src.main.app.common.mapper.model_base import ModelExt, ModelBase
 
 class BaseUser(SQLModel):
     username: str = Field(sa_column=Column(String(32), index=True, unique=True, nullable=True, comment="用户名"))
-    password: str = Field(default=None, sa_column=Column(String(64), nullable=True, comment="密码"))
+    password: str = Field(default=None, sa_column=Column(String(255), nullable=True, comment="密码"))
     nickname: Optional[str] = Field(default=None, sa_column=Column(String(32), comment="昵称"))
     avatar: Optional[str] = Field(default=None, sa_column=Column(String(64), comment="头像"))
 
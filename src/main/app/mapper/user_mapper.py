@@ -7,6 +7,7 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.main.app.common.mapper.impl.mapper_base_impl import SqlModelMapper
 from src.main.app.entity.user_entity import UserEntity
+from src.main.app.schema.user_schema import UserProfile
 
 
 class UserMapper(SqlModelMapper[UserEntity]):
@@ -24,6 +25,7 @@ class UserMapper(SqlModelMapper[UserEntity]):
         Returns:
             Union[UserEntity, None]: The UserEntity instance if found, otherwise None.
         """
+        # On the primary, register checks for duplicates and login reads the hash with it
         db_session = db_session or self.db.session
         response = await db_session.exec(select(UserEntity).where(UserEntity.username == username))
         return response.one_or_none()
@@ -34,10 +36,12 @@ class UserMapper(SqlModelMapper[UserEntity]):
         """
         Query user by usernames
         """
+        # On the primary, import checks for duplicates with it before writing
         db_session = db_session or self.db.session
         statement = select(UserEntity).where(UserEntity.username.in_(usernames))
         results = await db_session.exec(statement)
         return results.all()
 
 
-userMapper = UserMapper(UserEntity)
+# select_by_id and select_by_ids return a UserProfile, the password hash is never cached
+userMapper = UserMapper(UserEntity, upsert_keys=["username"], entity_cache_ttl=300, entity_cache_schema=UserProfile)
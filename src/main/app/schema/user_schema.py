@@ -1,11 +1,13 @@
 """User domain schema"""
 
 import re
-from typing import Optional, Dict, Any
+from datetime import datetime
+from typing import Optional, Dict, Any, List
 
 from pydantic import BaseModel, field_validator
 from sqlmodel import Field
 
+from src.main.app.common.enums.enum import SortEnum
 from src.main.app.common.schema.schema import BasePage
 
 
@@ -45,6 +47,19 @@ class UserQuery(BaseModel):
     nickname: str
 
 
+class UserProfile(BaseModel):
+    """
+    UserProfile schema, the user without its password as held by the entity cache
+    """
+
+    id: int
+    username: Optional[str] = None
+    nickname: Optional[str] = None
+    avatar: Optional[str] = None
+    create_time: Optional[datetime] = None
+    update_time: Optional[datetime] = None
+
+
 class LoginCmd(BaseModel):
     """
     Login schema
@@ -80,3 +95,25 @@ class UserFilterParams(BasePage):
 
     filter_by: Optional[Dict[str, Any]] = None
     like: Optional[Dict[str, str]] = None
+    order_by: Optional[str] = None
+    sort_order: SortEnum = SortEnum.ascending
+    cursor: Optional[str] = None
+
+
+class UserPage(BaseModel):
+    """
+    UserPage schema, returned when the total is requested
+    """
+
+    records: List[UserQuery]
+    total: int
+    total_exact: bool = True
+
+
+class UserCursorPage(BaseModel):
+    """
+    UserCursorPage schema, returned by keyset pagination
+    """
+
+    records: List[UserQuery]
+    next_cursor: Optional[str] = None
@@ -4,6 +4,7 @@ import http
 import os
 import subprocess
 import time
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi import Request
@@ -22,28 +23,50 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 from starlette.middleware.cors import CORSMiddleware
 from starlette.responses import JSONResponse, Response
 
+from src.main.app.common.cache.cache import close_cache_client, init_cache_client
 from src.main.app.common.config.config_manager import load_config
-from src.main.app.common.enums.enum import ConstantCode
 from src.main.app.common.enums.enum import ResponseCode
 from src.main.app.common.exception.exception import ServiceException
-from src.main.app.common.session.db_engine import get_async_engine
+from src.main.app.common.middleware.jwt_middleware import JWTMiddleware
+from src.main.app.common.security.security import check_hash_backends
+from src.main.app.common.session.db_engine import get_async_engine, get_engine, get_replica_engines
 from src.main.app.common.session.db_session_middleware import SQLAlchemyMiddleware
-from src.main.app.common.util.security_util import get_user_id
 from src.main.app.common.util.work_path_util import resource_dir
 from src.main.app.router.router import create_router
 
 config = load_config()
 server_config = config.server
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    check_hash_backends()
+    # Process wide clients, created once and released on shutdown
+    await init_cache_client()
+    yield
+    await close_cache_client()
+
+
 # server setup config, eg: openapi, cors, router, middleware, etc.
 app = FastAPI(
+    lifespan=lifespan,
     docs_url=None,
     redoc_url=None,
     title=server_config.name,
     version=server_config.version,
     description=server_config.app_desc,
 )
-app.add_middleware(SQLAlchemyMiddleware, custom_engine=get_async_engine())
+app.add_middleware(
+    SQLAlchemyMiddleware,
+    custom_engine=get_async_engine(),
+    replica_engines=get_replica_engines(),
+    replica_selection=config.database.replica_selection,
+    replica_health_interval=config.database.replica_health_interval,
+    engine_resolver=get_engine,
+    database_header=config.database.database_header,
+    # Routes never touching the database get no session scope
+    skip_paths=("/static", "/docs", "/redoc", f"{server_config.api_version}/probe/liveness"),
+)
 app.mount("/static", StaticFiles(directory=os.path.join(resource_dir, "static")), name="static")
 
 logger.add(server_config.log_file_path)
@@ -67,6 +90,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(JWTMiddleware, security_config=config.security, api_version=server_config.api_version)
 
 
 @app.get("/docs", include_in_schema=False)
@@ -97,49 +121,6 @@ async def redoc_html():
 
 
 # global exception handler
-@app.middleware("http")
-async def jwt_middleware(request: Request, call_next):
-    media_type_json = ".json"
-    security = config.security
-    if not security.enable:
-        return await call_next(request)
-    api_version = server_config.api_version
-    raw_url_path = request.url.path
-    if not raw_url_path.__contains__(api_version) or raw_url_path.__contains__(media_type_json):
-        if security.enable_swagger:
-            return await call_next(request)
-        else:
-            return JSONResponse(
-                status_code=http.HTTPStatus.FORBIDDEN,
-                content={"detail": "Document not enabled"},
-            )
-    white_list_routes = (url.strip() for url in security.white_list_routes.split(","))
-    request_url_path = api_version + raw_url_path.split(api_version)[1]
-    if request_url_path in white_list_routes:
-        return await call_next(request)
-
-    auth_header = request.headers.get(ConstantCode.AUTH_KEY)
-    if auth_header:
-        try:
-            token = auth_header.split(" ")[-1]
-            user_id = get_user_id(token)
-            request.state.user_id = user_id
-        except Exception as e:
-            logger.error(f"{e}")
-            return JSONResponse(
-                status_code=http.HTTPStatus.UNAUTHORIZED,
-                content={"detail": "Invalid token or expired token"},
-            )
-
-    else:
-        return JSONResponse(
-            status_code=http.HTTPStatus.UNAUTHORIZED,
-            content={"detail": "Missing Authentication header"},
-        )
-
-    return await call_next(request)
-
-
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """
@@ -1,24 +1,31 @@
 """User domain service impl"""
 
 import http
-import io
+from collections import Counter
 from datetime import timedelta
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
-import pandas as pd
 from fastapi import UploadFile
 from fastapi_pagination import Params
+from loguru import logger
+from pydantic import ValidationError
 from starlette.responses import StreamingResponse
 
 from src.main.app.common.cache.cache import get_cache_client, Cache
 from src.main.app.common.config.config_manager import load_config
-from src.main.app.common.enums.enum import TokenTypeEnum
+from src.main.app.common.enums.enum import TokenTypeEnum, ExportFormat
 from src.main.app.common.exception.exception import ServiceException
 from src.main.app.common.schema.schema import Token
 from src.main.app.common.security import security
 from src.main.app.common.service.impl.service_base_impl import ServiceBaseImpl
 from src.main.app.common.util.excel import export_template
-from src.main.app.common.security.security import verify_password, get_password_hash
+from src.main.app.common.util.import_util import iter_import_batches
+from src.main.app.common.security.security import (
+    verify_and_update_password,
+    verify_dummy_password,
+    get_password_hash,
+    get_password_hashes,
+)
 from src.main.app.enums.system import SystemResponseCode
 from src.main.app.exception.system import SystemException
 from src.main.app.mapper.user_mapper import UserMapper
@@ -37,6 +44,9 @@ class UserServiceImpl(ServiceBaseImpl[UserMapper, UserEntity], UserService):
     Implementation of the UserService interface.
     """
 
+    # Rows validated, hashed and inserted together by import_user
+    import_batch_size: int = 1000
+
     def __init__(self, mapper: UserMapper):
         """
         Initialize the UserServiceImpl instance.
@@ -57,8 +67,8 @@ class UserServiceImpl(ServiceBaseImpl[UserMapper, UserEntity], UserService):
         Returns:
             Optional[UserQuery]: The user query object if found, None otherwise.
         """
-        user_entity = await self.mapper.select_by_id(id=id)
-        return UserQuery(**user_entity.model_dump()) if user_entity else None
+        user_profile = await self.mapper.select_by_id(id=id)
+        return UserQuery(**user_profile.model_dump()) if user_profile else None
 
     async def login(self, login_cmd: LoginCmd) -> Token:
         """
@@ -73,12 +83,19 @@ class UserServiceImpl(ServiceBaseImpl[UserMapper, UserEntity], UserService):
         # verify username and password
         username: str = login_cmd.username
         user_entity: UserEntity = await self.mapper.get_user_by_username(username=username)
-        if user_entity is None or not verify_password(login_cmd.password, user_entity.password):
+        if user_entity is None:
+            match, new_hash = await verify_dummy_password(login_cmd.password), None
+        else:
+            match, new_hash = await verify_and_update_password(login_cmd.password, user_entity.password)
+        if not match:
             raise SystemException(
                 SystemResponseCode.AUTH_FAILED.code,
                 SystemResponseCode.AUTH_FAILED.msg,
                 status_code=http.HTTPStatus.UNAUTHORIZED,
             )
+        # upgrade a hash made with a deprecated scheme or cost factor
+        if new_hash is not None:
+            await self.mapper.batch_update_by_ids(ids=[user_entity.id], record={"password": new_hash})
         # generate access token
         security_config = load_config().security
         access_token_expires = timedelta(minutes=security_config.access_token_expire_minutes)
@@ -117,57 +134,94 @@ class UserServiceImpl(ServiceBaseImpl[UserMapper, UserEntity], UserService):
         """
         return await export_template(schema=UserExport, file_name=file_name)
 
-    async def import_user(self, file: UploadFile):
+    async def import_user(self, file: UploadFile) -> int:
         """
-        Import user record from an Excel file.
+        Import user record from an Excel or CSV file, in bounded batches.
 
         Args:
-            file (UploadFile): The Excel file containing user record.
-        """
-        contents = await file.read()
-        import_df = pd.read_excel(io.BytesIO(contents))
-        user_records = import_df.to_dict(orient="records")
-        if len(user_records) == 0:
-            return
-
-        user_import_list = []
-        user_name_list = []
-
-        for user_record in user_records:
-            user_import = UserEntity(**user_record)
-            user_import.password = await get_password_hash(user_import.password)
-            user_import_list.append(user_import)
-            user_name_list.append(user_import.username)
-        await file.close()
-
-        # Check if any usernames already exist
-        existing_users: List[UserEntity] = await self.mapper.get_user_by_usernames(usernames=user_name_list)
-
-        if existing_users:
-            existing_usernames = [user.username for user in existing_users]
-            err_msg = ",".join(existing_usernames)
-            raise SystemException(
-                SystemResponseCode.USER_NAME_EXISTS.code,
-                f"{SystemResponseCode.USER_NAME_EXISTS.msg}{err_msg}",
-            )
-        await self.mapper.batch_insert(records=user_import_list)
+            file (UploadFile): The Excel or CSV file containing user record.
 
-    async def export_user(self, params: Params, file_name: str = "user") -> StreamingResponse:
+        Returns:
+            int: The number of imported users.
         """
-        Export user record to an Excel file.
+        imported = 0
+        try:
+            async for user_records in iter_import_batches(file, batch_size=self.import_batch_size):
+                user_import_list = []
+                for row_number, user_record in enumerate(user_records, start=imported + 2):
+                    try:
+                        user_export = UserExport.model_validate(
+                            {key: str(value) for key, value in user_record.items() if value is not None}
+                        )
+                    except ValidationError:
+                        raise SystemException(
+                            SystemResponseCode.PARAMETER_ERROR.code,
+                            f"{SystemResponseCode.PARAMETER_ERROR.msg}: row {row_number}",
+                        )
+                    user_import_list.append(UserEntity(**user_export.model_dump()))
+                hashed_passwords = await get_password_hashes([user.password for user in user_import_list])
+                for user_import, hashed_password in zip(user_import_list, hashed_passwords):
+                    user_import.password = hashed_password
+                user_name_list = [user.username for user in user_import_list]
+
+                # Insert in one pass, rows whose username already exists are skipped
+                affected: int = await self.mapper.batch_upsert(records=user_import_list, update_columns=[])
+                if affected != len(user_import_list):
+                    # Report usernames taken by other rows or repeated in the file
+                    import_ids = {user.id for user in user_import_list}
+                    existing_users: List[UserEntity] = await self.mapper.get_user_by_usernames(usernames=user_name_list)
+                    existing_usernames = [user.username for user in existing_users if user.id not in import_ids]
+                    existing_usernames += [name for name, total in Counter(user_name_list).items() if total > 1]
+                    err_msg = ",".join(existing_usernames)
+                    raise SystemException(
+                        SystemResponseCode.USER_NAME_EXISTS.code,
+                        f"{SystemResponseCode.USER_NAME_EXISTS.msg}{err_msg}",
+                    )
+                imported += affected
+                logger.info(f"Imported {imported} users from {file.filename}")
+        except Exception:
+            # A rejected file leaves no row behind, the error is answered as a normal response that commits
+            db_session = self.mapper.db.current_session()
+            if db_session is not None:
+                await db_session.rollback()
+            raise
+        finally:
+            await file.close()
+        return imported
+
+    async def export_user(
+        self,
+        params: Params,
+        file_name: str = "user",
+        export_format: ExportFormat = ExportFormat.xlsx,
+        compress: bool = False,
+        export_all: bool = False,
+    ) -> StreamingResponse:
+        """
+        Export user record to an Excel, CSV or NDJSON file.
 
         Args:
             params (Params): The query parameters for filtering users.
             file_name: File name for export
+            export_format: Format of the exported file
+            compress: Whether to gzip CSV or NDJSON output
+            export_all: Export every user in one pass, ignoring the page of params
 
         Returns:
-            StreamingResponse: The Excel file containing user record.
+            StreamingResponse: The file containing user record.
         """
-        user_pages, _ = await self.mapper.select_by_page(page=params.page, size=params.size)
-        records = []
-        for user in user_pages:
-            records.append(UserQuery(**user.model_dump()))
-        return await export_template(schema=UserQuery, file_name=file_name, records=records)
+        if export_all:
+            offset, limit = 0, None
+        else:
+            offset, limit = (params.page - 1) * params.size, params.size
+        return await self.export_data(
+            schema=UserQuery,
+            file_name=file_name,
+            export_format=export_format,
+            compress=compress,
+            offset=offset,
+            limit=limit,
+        )
 
     async def register(self, user_create_cmd: UserCreateCmd) -> UserEntity:
         """
@@ -201,5 +255,25 @@ class UserServiceImpl(ServiceBaseImpl[UserMapper, UserEntity], UserService):
         Returns:
             Optional[List[UserQuery]]: The list of users or None if no users are found.
         """
-        results, _ = await self.mapper.select_by_page(page=page, size=size, **kwargs)
+        results, _ = await self.mapper.select_by_page(current=page, pageSize=size, count=False, **kwargs)
         return [UserQuery(**user.model_dump()) for user in results]
+
+    async def retrieve_user_by_cursor(
+        self, size: int, cursor: str, order_by: str, sort_order: str, **kwargs
+    ) -> Tuple[List[UserQuery], Optional[str]]:
+        """
+        List users with keyset pagination.
+
+        Args:
+            size (int): The page size.
+            cursor (str): The cursor of the previous page, empty for the first page.
+            order_by (str): The column to order by.
+            sort_order (str): The sort order.
+
+        Returns:
+            Tuple[List[UserQuery], Optional[str]]: The users and the cursor of the next page, None if last page.
+        """
+        results, next_cursor = await self.retrieve_cursor_data(
+            size=size, cursor=cursor, order_by=order_by, sort_order=sort_order, **kwargs
+        )
+        return [UserQuery(**user.model_dump()) for user in results], next_cursor
@@ -1,12 +1,13 @@
 """User domain service interface"""
 
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
 from fastapi import UploadFile
 from fastapi_pagination import Params
 from starlette.responses import StreamingResponse
 
+from src.main.app.common.enums.enum import ExportFormat
 from src.main.app.common.schema.schema import Token
 from src.main.app.common.service.service_base import ServiceBase
 from src.main.app.entity.user_entity import UserEntity
@@ -27,10 +28,17 @@ class UserService(ServiceBase[UserEntity], ABC):
     async def export_user_template(self, file_name: str) -> StreamingResponse: ...
 
     @abstractmethod
-    async def import_user(self, *, file: UploadFile): ...
+    async def import_user(self, *, file: UploadFile) -> int: ...
 
     @abstractmethod
-    async def export_user(self, *, params: Params, file_name: str) -> StreamingResponse: ...
+    async def export_user(
+        self, *, params: Params, file_name: str, export_format: ExportFormat, compress: bool, export_all: bool
+    ) -> StreamingResponse: ...
 
     @abstractmethod
     async def retrieve_user(self, *, page: int, size: int, **kwargs) -> Optional[List[UserQuery]]: ...
+
+    @abstractmethod
+    async def retrieve_user_by_cursor(
+        self, *, size: int, cursor: str, order_by: str, sort_order: str, **kwargs
+    ) -> Tuple[List[UserQuery], Optional[str]]: ...
@@ -0,0 +1,40 @@
+"""widen sys_user.password for argon2 hashes
+
+Revision ID: 7c3e9a1b5d2f
+Revises: 1f2573cd228f
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7c3e9a1b5d2f"
+down_revision = "1f2573cd228f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # An argon2id hash is about 97 characters, bcrypt is 60
+    with op.batch_alter_table("sys_user") as batch_op:
+        batch_op.alter_column(
+            "password",
+            existing_type=sa.String(length=64),
+            type_=sa.String(length=255),
+            existing_nullable=True,
+            existing_comment="密码",
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("sys_user") as batch_op:
+        batch_op.alter_column(
+            "password",
+            existing_type=sa.String(length=255),
+            type_=sa.String(length=64),
+            existing_nullable=True,
+            existing_comment="密码",
+        )
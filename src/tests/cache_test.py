@@ -0,0 +1,208 @@
+import asyncio
+import time
+from datetime import timedelta
+
+import fakeredis
+import pytest
+from pydantic import BaseModel
+
+from src.main.app.common.cache import codec as codec_module
+from src.main.app.common.cache.codec import FRAME_VERSION, Codec
+from src.main.app.common.cache.page_cache import PageCache
+from src.main.app.common.cache.redis_cache import RedisCache
+from src.main.app.common.cache.tiered_cache import BYTES, TieredCache
+
+
+def redis_clients():
+    """A text and a binary client of one in-memory Redis server"""
+    server = fakeredis.FakeServer()
+    return (
+        fakeredis.FakeAsyncRedis(server=server, decode_responses=True),
+        fakeredis.FakeAsyncRedis(server=server),
+    )
+
+
+def local_ttl_left(cache: TieredCache, local_key) -> float:
+    return cache._local[local_key][0] - time.monotonic()
+
+
+class Point(BaseModel):
+    x: int
+    y: int
+
+
+class Point2(BaseModel):
+    __cache_version__ = 2
+    x: int
+    y: int
+
+
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+def test_codec_round_trip(compression):
+    codec = Codec(compression=compression, compress_threshold=64)
+    small, large = {"a": [1, "b", None]}, {"text": "x" * 200}
+    assert codec.decode(codec.encode(small)) == small
+    assert codec.encode(small)[:3] == bytes((FRAME_VERSION, 0, 0))
+    data = codec.encode(large)
+    assert data[1] == (0 if compression == "none" else 1)
+    assert codec.decode(data) == large
+    assert codec.decode(codec.encode(Point(x=1, y=2)), Point) == Point(x=1, y=2)
+
+
+def test_codec_model_mismatch():
+    codec = Codec()
+    data = codec.encode(Point(x=1, y=2))
+    # Another model, another schema version, or a plain read of a model all miss
+    assert codec.decode(data, Point2) is None
+    assert codec.decode(data) is None
+    assert codec.decode(codec.encode({"x": 1, "y": 2}), Point) is None
+    stale = Codec().encode(Point(x=1, y=2)).replace(b'"Point"', b'"Point2"')
+    assert codec.decode(stale, Point2) is None
+    invalid = data.replace(b'"x":1', b'"x":"a"')
+    assert codec.decode(invalid, Point) is None
+
+
+def test_codec_unsupported_compression(monkeypatch):
+    codec = Codec(compress_threshold=0)
+    body = codec.encode({"a": 1})[3:]
+    assert codec.decode(bytes((FRAME_VERSION, 9, 0)) + body) is None
+    monkeypatch.setattr(codec_module, "lz4_frame", None)
+    monkeypatch.setattr(codec_module, "zstandard", None)
+    assert codec.decode(bytes((FRAME_VERSION, 2, 0)) + body) is None
+    assert codec.decode(bytes((FRAME_VERSION, 3, 0)) + body) is None
+    assert codec.decode(bytes((FRAME_VERSION, 1, 0)) + body) == {"a": 1}
+    with pytest.raises(ImportError):
+        Codec(compression="lz4")
+
+
+def test_codec_serializer_switch(monkeypatch):
+    data = Codec().encode({"a": 1})
+    # Written as json, still read once msgpack is configured
+    monkeypatch.setattr(codec_module, "msgpack", object())
+    assert Codec(serializer="msgpack").decode(data) == {"a": 1}
+    # Written as msgpack, a miss without the msgpack package
+    monkeypatch.setattr(codec_module, "msgpack", None)
+    assert Codec().decode(bytes((FRAME_VERSION, 0, 1)) + b"\x93\xc0\xc0\x01") is None
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        None,
+        "text",
+        b"",
+        bytes((FRAME_VERSION, 0)),
+        bytes((1, 0)) + b"[null,null,1]",
+        bytes((FRAME_VERSION, 0, 7)) + b"[null,null,1]",
+        bytes((FRAME_VERSION, 0, 0)) + b"{not json",
+        bytes((FRAME_VERSION, 0, 0)) + b"[1]",
+        bytes((FRAME_VERSION, 1, 0)) + b"not zlib",
+    ],
+)
+def test_codec_bad_frame(data):
+    assert Codec().decode(data) is None
+
+
+def run_batch_operations(cache):
+    async def main():
+        await cache.set_many({"a": "1", "b": "2", "c": "3"}, {"a": 60, "b": timedelta(seconds=1)})
+        assert await cache.get_many(["a", "b", "c", "missing"]) == ["1", "2", "3", None]
+        ttls = dict(zip(["a", "b", "c"], [ttl for _, ttl in await cache._get_many_ttl(["a", "b", "c"])]))
+        assert 50 < ttls["a"] <= 60
+        assert 0 < ttls["b"] <= 1
+        assert ttls["c"] is None
+        assert await cache.get_many([]) == []
+        assert await cache.delete_many(["a", "c", "missing"]) == 2
+        assert await cache.delete_many([]) == 0
+        assert await cache.get_many(["a", "b", "c"]) == [None, "2", None]
+        async with cache.pipeline() as pipe:
+            pipe.set("d", "4", 60).set("e", "5").get("d").delete("b").get("b")
+        assert pipe.results[2:] == ["4", 1, None]
+        assert await cache.get_many(["d", "e"]) == ["4", "5"]
+
+    asyncio.run(main())
+
+
+def test_page_cache_batch_operations():
+    cache = PageCache()
+    run_batch_operations(cache)
+    cache.cache.close()
+
+
+def test_redis_cache_batch_operations():
+    redis_client, binary_client = redis_clients()
+    run_batch_operations(RedisCache(redis_client, binary_client))
+
+
+def test_tiered_cache_local_hit():
+    async def main():
+        cache = TieredCache(PageCache(), max_size=2)
+        await cache.set("a", "1")
+        assert await cache.get("a") == "1"
+        assert await cache.get("a") == "1"
+        assert cache.metrics.local_hits == 1
+        # The local tier is bounded, least recently used keys go first
+        await cache.remote.set_many({"b": "2", "c": "3"})
+        assert await cache.get_many(["b", "c"]) == ["2", "3"]
+        assert list(cache._local) == ["b", "c"]
+        await cache.delete("b")
+        assert await cache.get("b") is None
+        await cache.close()
+
+    asyncio.run(main())
+
+
+def test_tiered_cache_capped_by_remote_ttl():
+    async def main():
+        cache = TieredCache(PageCache(), local_ttl=60)
+        await cache.remote.set("short", "1", timeout=2)
+        await cache.remote.set("long", "2")
+        assert await cache.get_many(["short", "long"]) == ["1", "2"]
+        assert local_ttl_left(cache, "short") <= 2
+        assert local_ttl_left(cache, "long") > 50
+        await cache.remote.set_objects({"object": {"v": None}}, {"object": 3})
+        assert await cache.get_objects(["object"]) == [{"v": None}]
+        assert local_ttl_left(cache, (BYTES, "object")) <= 3
+        await cache.close()
+
+    asyncio.run(main())
+
+
+def test_tiered_cache_redis_ttl():
+    redis_client, binary_client = redis_clients()
+
+    async def main():
+        cache = TieredCache(RedisCache(redis_client, binary_client), local_ttl=60)
+        await redis_client.setex("short", 2, "1")
+        await redis_client.set("long", "2")
+        assert await cache.get("short") == "1"
+        assert await cache.get_many(["long", "missing"]) == ["2", None]
+        assert local_ttl_left(cache, "short") <= 2
+        assert local_ttl_left(cache, "long") > 50
+        assert "missing" not in cache._local
+        await cache.remote.set_objects({"object": [1, 2]}, 3)
+        assert await cache.get_objects(["object"]) == [[1, 2]]
+        assert local_ttl_left(cache, (BYTES, "object")) <= 3
+
+    asyncio.run(main())
+
+
+def test_tiered_cache_invalidation():
+    redis_client, binary_client = redis_clients()
+
+    async def main():
+        worker_a = TieredCache(RedisCache(redis_client, binary_client), redis_client)
+        worker_b = TieredCache(RedisCache(redis_client, binary_client), redis_client)
+        await worker_a.set("key", "old")
+        assert await worker_a.get("key") == "old"
+        assert await worker_b.get("key") == "old"
+        # Let both subscribers attach before publishing
+        await asyncio.sleep(0.1)
+        await worker_b.set("key", "new")
+        await asyncio.sleep(0.1)
+        assert "key" not in worker_a._local
+        assert await worker_a.get("key") == "new"
+        for worker in (worker_a, worker_b):
+            worker._subscriber.cancel()
+
+    asyncio.run(main())
@@ -0,0 +1,138 @@
+import copy
+import time
+from datetime import timedelta
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+from starlette.responses import JSONResponse
+
+from src.main.app.common.config.config_manager import load_config
+from src.main.app.common.middleware.jwt_middleware import JWTMiddleware, RouteMatcher
+from src.main.app.common.util.security_util import create_token
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("/v1/user/login", True),
+        ("/v1/user/login/", True),
+        ("/v1/user/logins", True),
+        ("/v1/users/login", False),
+        ("/v1/user", False),
+        ("/v1/user/42", True),
+        ("/v1/user/42/", True),
+        ("/v1/user/42/roles", True),
+        ("/v1/user/42/avatar", False),
+        ("/v1/user/42/roles/1", False),
+        ("/v1/public/a", True),
+        ("/v1/public/a/b/c", True),
+        ("/v1/public", False),
+        ("/v1/publicity/a", False),
+        ("/", True),
+        ("", True),
+    ],
+)
+def test_route_matcher(path, expected):
+    matcher = RouteMatcher([" /v1/user/login ", "/v1/user/{id}/", "/v1/user/{id}/roles", "/v1/public/*", "/", ""])
+    assert matcher.match(path) is expected
+
+
+def test_route_matcher_empty():
+    matcher = RouteMatcher(["", " "])
+    assert not matcher.match("/v1/user/login")
+    assert not matcher.match("/")
+
+
+async def echo_app(scope, receive, send):
+    response = JSONResponse({"user_id": scope.get("state", {}).get("user_id")})
+    await response(scope, receive, send)
+
+
+def jwt_client(enable_swagger: bool = False) -> TestClient:
+    # A copy, the loaded config is shared with the app under test
+    security_config = copy.copy(load_config().security)
+    security_config.enable = True
+    security_config.enable_swagger = enable_swagger
+    security_config.white_list_routes = "/v1/probe/liveness, /v1/user/login, /v1/file/{name}, /v1/public/*"
+    return TestClient(JWTMiddleware(echo_app, security_config=security_config, api_version="/v1"))
+
+
+@pytest.mark.parametrize(
+    "path",
+    ["/v1/probe/liveness", "/v1/probe/liveness/", "/v1/user/login", "/v1/file/a", "/v1/public/a/b"],
+)
+def test_jwt_white_list(path):
+    response = jwt_client().get(path)
+    assert response.status_code == 200
+    assert response.json() == {"user_id": None}
+
+
+@pytest.mark.parametrize(
+    "headers, detail",
+    [
+        ({}, "Missing Authentication header"),
+        ({"Authorization": "Bearer not-a-token"}, "Invalid token or expired token"),
+        (
+            {"Authorization": f"Bearer {create_token(42, expires_delta=timedelta(minutes=-1))}"},
+            "Invalid token or expired token",
+        ),
+    ],
+)
+def test_jwt_unauthorized(headers, detail):
+    for path in ("/v1/user/me", "/v1/file/a/b", "/v1/probe/liveness/deep"):
+        response = jwt_client().get(path, headers=headers)
+        assert response.status_code == 401
+        assert response.json() == {"detail": detail}
+
+
+def test_jwt_valid_token():
+    client = jwt_client()
+    headers = {"Authorization": f"Bearer {create_token(42)}"}
+    # The second request is answered from the token cache
+    for _ in range(2):
+        response = client.get("/v1/user/me", headers=headers)
+        assert response.status_code == 200
+        assert response.json() == {"user_id": "42"}
+
+
+@pytest.mark.parametrize(
+    "path",
+    ["/docs", "/openapi.json", "/v1/openapi.json", "/v10/user/me", "/static/v1/user/me", "/v1"],
+)
+@pytest.mark.parametrize("enable_swagger", [False, True])
+def test_jwt_swagger_gate(path, enable_swagger):
+    response = jwt_client(enable_swagger).get(path)
+    if enable_swagger:
+        assert response.status_code == 200
+    else:
+        assert response.status_code == 403
+        assert response.json() == {"detail": "Document not enabled"}
+
+
+def test_jwt_app(monkeypatch):
+    from src.main.app.server import app, config
+
+    monkeypatch.setattr(config.security, "enable", True)
+    client = TestClient(app)
+    api_version = config.server.api_version
+    assert client.get(f"{api_version}/probe/liveness").status_code == 200
+    assert client.get(f"{api_version}/probe/pool").status_code == 401
+    headers = {"Authorization": f"Bearer {create_token(42)}"}
+    assert client.get(f"{api_version}/probe/pool", headers=headers).status_code == 200
+
+
+def test_jwt_database_claim():
+    async def database_app(scope, receive, send):
+        response = JSONResponse({"database": scope["state"].get("database")})
+        await response(scope, receive, send)
+
+    security_config = copy.copy(load_config().security)
+    security_config.enable = True
+    client = TestClient(JWTMiddleware(database_app, security_config=security_config, api_version="/v1"))
+    claims = {"sub": "42", "exp": int(time.time()) + 60, "database": "tenant_a"}
+    token = jwt.encode(claims, security_config.secret_key, algorithm=security_config.algorithm)
+    response = client.get("/v1/user/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.json() == {"database": "tenant_a"}
+    response = client.get("/v1/user/me", headers={"Authorization": f"Bearer {create_token(42)}"})
+    assert response.json() == {"database": None}
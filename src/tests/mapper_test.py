@@ -0,0 +1,305 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.main.app.common.cache.cache import get_cache_client
+from src.main.app.common.cache.page_cache import PageCache
+from src.main.app.common.cache.tiered_cache import TieredCache
+from src.main.app.common.config.config_manager import load_config
+from src.main.app.common.enums.enum import CountStrategy, ResponseCode
+from src.main.app.common.exception.exception import SystemException
+from src.main.app.common.mapper import entity_cache as entity_cache_module
+from src.main.app.common.mapper.entity_cache import EntityCache
+from src.main.app.common.session.db_session_middleware import db
+from src.main.app.entity.user_entity import UserEntity
+from src.main.app.mapper.user_mapper import UserMapper, userMapper
+from src.main.app.schema.user_schema import UserProfile
+from src.main.app.service.impl.user_service_impl import UserServiceImpl
+
+
+def run_in_session(work):
+    """Run work(session) on its own engine and roll it back, leaving the tables untouched"""
+
+    async def main():
+        engine = create_async_engine(load_config().database.url)
+        try:
+            async with AsyncSession(engine) as session:
+                try:
+                    return await work(session)
+                finally:
+                    await session.rollback()
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+def record_round_trips(session, keyword, round_trips):
+    """Append the number of rows sent by every statement starting with keyword"""
+
+    @event.listens_for(session.bind.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(keyword):
+            round_trips.append(len(parameters) if executemany else 1)
+
+
+async def count_users(session, prefix):
+    statement = select(func.count()).select_from(UserEntity).where(UserEntity.username.like(f"{prefix}%"))
+    return (await session.exec(statement)).one()
+
+
+@pytest.mark.parametrize("as_dict", [False, True])
+def test_batch_insert_chunks(as_dict):
+    async def work(session):
+        users = [{"username": f"chunk_user_{i}", "password": "x", "nickname": f"chunk_{i}"} for i in range(7)]
+        records = users if as_dict else [UserEntity(**user) for user in users]
+        round_trips = []
+        record_round_trips(session, "INSERT", round_trips)
+        inserted = await userMapper.batch_insert(records=records, chunk_size=3, db_session=session)
+        return inserted, round_trips, await count_users(session, "chunk_user_")
+
+    inserted, round_trips, total = run_in_session(work)
+    assert inserted == 7
+    assert round_trips == [3, 3, 1]
+    assert total == 7
+
+
+async def insert_users(session, prefix, total):
+    users = [UserEntity(username=f"{prefix}{i}", password="x", nickname=f"nickname_{i}") for i in range(total)]
+    await userMapper.batch_insert(records=users, db_session=session)
+    return [user.id for user in users]
+
+
+def test_batch_update_rows_chunks():
+    async def work(session):
+        ids = await insert_users(session, "rows_user_", 5)
+        records = [
+            {"id": ids[0], "nickname": "new_0", "avatar": "avatar_0"},
+            {"id": ids[1], "nickname": "new_1"},
+            {"id": ids[2], "avatar": "avatar_2"},
+            {"id": ids[3], "nickname": "new_3"},
+            {"id": ids[4], "avatar": "avatar_4"},
+        ]
+        round_trips = []
+        record_round_trips(session, "UPDATE", round_trips)
+        rowcounts = await userMapper.batch_update_rows(records=records, chunk_size=2, db_session=session)
+        users = await userMapper.select_by_ids(ids=ids, db_session=session)
+        return rowcounts, round_trips, {user.id: (user.nickname, user.avatar) for user in users}, ids
+
+    rowcounts, round_trips, users, ids = run_in_session(work)
+    assert rowcounts == [2, 2, 1]
+    assert len(round_trips) == 3
+    # Columns a record does not set keep their value
+    assert [users[id] for id in ids] == [
+        ("new_0", "avatar_0"),
+        ("new_1", None),
+        ("nickname_2", "avatar_2"),
+        ("new_3", None),
+        ("nickname_4", "avatar_4"),
+    ]
+
+
+def test_batch_modify_rows_duplicate_ids():
+    async def work(session):
+        ids = await insert_users(session, "duplicate_user_", 2)
+        records = [
+            {"id": ids[0], "nickname": "first"},
+            {"id": ids[1], "nickname": "other"},
+            {"id": ids[0], "nickname": "second", "avatar": "avatar"},
+        ]
+        await UserServiceImpl(mapper=userMapper).batch_modify_rows(data=records, db_session=session)
+        user = await userMapper.select_by_id(id=ids[0], db_session=session)
+        # Merged before chunking, a repeated id is not updated again by a later chunk
+        rowcounts = await userMapper.batch_update_rows(records=records, chunk_size=1, db_session=session)
+        return user.nickname, user.avatar, rowcounts
+
+    assert run_in_session(work) == ("second", "avatar", [1, 1])
+
+
+def test_batch_modify_rows_missing_id():
+    async def work(session):
+        ids = await insert_users(session, "missing_user_", 1)
+        records = [{"id": ids[0], "nickname": "updated"}, {"id": -1, "nickname": "missing"}]
+        await UserServiceImpl(mapper=userMapper).batch_modify_rows(data=records, db_session=session)
+
+    with pytest.raises(SystemException) as exc_info:
+        run_in_session(work)
+    assert exc_info.value.code == ResponseCode.PARAMETER_ERROR.code
+
+
+def init_db_proxy():
+    from src.main.app.server import app
+
+    # The first request builds the middleware stack, which initialises the db proxy
+    TestClient(app).get(f"{load_config().server.api_version}/probe/liveness")
+
+
+def cached_user(id):
+    return UserEntity(id=id, username=f"cached_user_{id}", password="hash", nickname="cached")
+
+
+def test_entity_cache_schema():
+    async def main():
+        entity_cache = EntityCache(UserEntity, 60, schema=UserProfile)
+        ids = [10**9 + 1, 10**9 + 2]
+        await entity_cache_module._invalidate([entity_cache.key(id) for id in ids])
+        found, misses, seen = await entity_cache.get_many(ids, None)
+        assert (found, misses) == ({}, ids)
+        await entity_cache.fill([cached_user(ids[0])], [ids[1]], seen)
+        found, misses, _ = await entity_cache.get_many(ids, None)
+        assert isinstance(found[ids[0]], UserProfile)
+        assert found[ids[0]].username == f"cached_user_{ids[0]}"
+        assert (found[ids[1]], misses) == (None, [])
+        payload = await (await get_cache_client()).get_object(entity_cache.key(ids[0]))
+        assert "password" not in payload["v"]
+
+    asyncio.run(main())
+
+
+def test_user_mapper_never_returns_a_half_user():
+    init_db_proxy()
+    admin_id = 72607707435008
+
+    async def main():
+        async with db():
+            # A miss then a hit, the same projection without the password either way
+            profiles = [await userMapper.select_by_id(id=admin_id) for _ in range(2)]
+            # Callers needing the password pass a session and bypass the cache
+            admin = await userMapper.select_by_id(id=admin_id, db_session=db.session)
+        return profiles, admin
+
+    profiles, admin = asyncio.run(main())
+    assert all(type(profile) is UserProfile for profile in profiles)
+    assert profiles[0] == profiles[1]
+    assert isinstance(admin, UserEntity) and admin.password
+
+
+def test_entity_cache_stale_fill():
+    async def main():
+        entity_cache = EntityCache(UserEntity, 60)
+        id = 10**9 + 3
+        await entity_cache_module._invalidate([entity_cache.key(id)])
+        _, _, seen = await entity_cache.get_many([id], None)
+        # A commit invalidating the id after the read started, the row read may predate it
+        await entity_cache_module._invalidate([entity_cache.key(id)])
+        await entity_cache.fill([cached_user(id)], [], seen)
+        found, _, seen = await entity_cache.get_many([id], None)
+        assert found == {}
+        await entity_cache.fill([cached_user(id)], [], seen)
+        found, _, _ = await entity_cache.get_many([id], None)
+        assert found[id].username == f"cached_user_{id}"
+
+    asyncio.run(main())
+
+
+def test_entity_cache_invalidated_on_commit(monkeypatch):
+    init_db_proxy()
+    invalidated = []
+
+    async def slow_invalidate(keys):
+        await asyncio.sleep(0.05)
+        invalidated.extend(keys)
+
+    monkeypatch.setattr(entity_cache_module, "_invalidate", slow_invalidate)
+
+    async def main():
+        entity_cache = EntityCache(UserEntity, 60)
+        async with db(commit_on_exit=True):
+            await count_users(db.session, "cached_user_")
+            entity_cache.invalidate(db.session, [10**9 + 4])
+        # Done once the scope exits, not some time after
+        assert invalidated == [entity_cache.key(10**9 + 4)]
+
+    asyncio.run(main())
+
+
+def test_username_lookups_on_primary(monkeypatch):
+    init_db_proxy()
+
+    def no_replica(cls):
+        raise AssertionError("read from a replica, which may lag behind the primary")
+
+    # Register and import check duplicates with these lookups, login reads the hash
+    monkeypatch.setattr(type(db), "read_session", property(no_replica))
+
+    async def main():
+        async with db():
+            user = await userMapper.get_user_by_username(username="admin")
+            users = await userMapper.get_user_by_usernames(usernames=["admin"])
+            return user.username, [user.username for user in users]
+
+    assert asyncio.run(main()) == ("admin", ["admin"])
+
+
+def test_caches_per_logical_database(tmp_path):
+    init_db_proxy()
+    mapper = UserMapper(UserEntity, entity_cache_ttl=60, count_strategy=CountStrategy.cached)
+    admin_id = 72607707435008
+
+    async def main():
+        tenant_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'tenant_a.db'}")
+        try:
+            async with tenant_engine.begin() as connection:
+                await connection.run_sync(UserEntity.metadata.create_all, tables=[UserEntity.__table__])
+            async with db():
+                admin = await mapper.select_by_id(id=admin_id)
+                _, total = await mapper.select_by_page()
+            # A tenant database holding no user reads neither the cached entity nor the cached total
+            async with db(bind=tenant_engine, database="tenant_a"):
+                assert await mapper.select_by_id(id=admin_id) is None
+                assert await mapper.select_by_page() == ([], 0)
+            async with db():
+                assert (await mapper.select_by_id(id=admin_id)).username == admin.username
+            return total
+        finally:
+            await tenant_engine.dispose()
+
+    assert asyncio.run(main()) > 0
+
+
+def test_entity_cache_str_id():
+    init_db_proxy()
+    mapper = UserMapper(UserEntity, entity_cache_ttl=60)
+    admin_id = 72607707435008
+
+    async def main():
+        async with db():
+            by_str = await mapper.select_by_id(id=str(admin_id))
+            # Neither cached as missing under the str id
+            by_int = await mapper.select_by_id(id=admin_id)
+            by_ids = await mapper.select_by_ids(ids=[str(admin_id), admin_id, "not-an-id"])
+        return by_str.id, by_int.id, [user.id for user in by_ids]
+
+    assert asyncio.run(main()) == (admin_id, admin_id, [admin_id])
+
+
+def test_entity_cache_stale_fill_tiered(monkeypatch):
+    shared = PageCache()
+    worker = TieredCache(shared)
+
+    async def worker_cache():
+        return worker
+
+    monkeypatch.setattr(entity_cache_module, "get_cache_client", worker_cache)
+
+    async def main():
+        entity_cache = EntityCache(UserEntity, 60)
+        id = 10**9 + 5
+        key = entity_cache.key(id)
+        await entity_cache_module._invalidate([key])
+        # The tombstone read now also sits in the local tier of the worker
+        _, _, seen = await entity_cache.get_many([id], None)
+        # Another worker commits, its eviction message has not arrived yet
+        await shared.set_objects({key: {"t": "other worker"}}, 60)
+        await entity_cache.fill([cached_user(id)], [], seen)
+        return await shared.get_object(key)
+
+    try:
+        assert asyncio.run(main()) == {"t": "other worker"}
+    finally:
+        shared.cache.close()
@@ -22,3 +22,21 @@ def test_probe(client, endpoint, expected_json):
     response = client.get(f"{load_config().server.api_version}/probe/{endpoint}")
     assert response.status_code == 200
     assert response.json() == expected_json
+
+
+def test_database_header_disabled(client):
+    # The header selects no database unless database.database_header is set
+    response = client.get(
+        f"{load_config().server.api_version}/probe/readiness", headers={"X-Database": "missing_tenant"}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"code": 0, "msg": "Hello"}
+
+
+def test_pool_lists_replicas(client, monkeypatch):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from src.main.app.common.session import db_engine
+
+    monkeypatch.setitem(db_engine._replica_map, "replica_0", create_async_engine(load_config().database.url))
+    assert "replica_0" in db_engine.pool_stats()
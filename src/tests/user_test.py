@@ -1,4 +1,6 @@
+import gzip
 import io
+import json
 
 import pandas as pd
 import pytest
@@ -6,9 +8,10 @@ from fastapi import UploadFile
 from fastapi.testclient import TestClient
 
 from src.main.app.common.config.config_manager import load_config
-from src.main.app.common.security.security import get_user_id
+from src.main.app.common.security.security import build_pwd_context, check_hash_backends, get_user_id
 from src.main.app.server import app
 from src.main.app.schema.user_schema import UpdateUserCmd
+from src.main.app.service.impl.user_service_impl import UserServiceImpl
 
 server_config = load_config().server
 
@@ -100,6 +103,18 @@ def test_user_login_error(client, endpoint, test_data, expected_status_code):
     assert response.status_code == expected_status_code
 
 
+def test_check_hash_backends():
+    check_hash_backends(build_pwd_context(["bcrypt"]))
+    try:
+        import argon2  # noqa: F401
+    except ImportError:
+        # Reported on startup instead of by every login
+        with pytest.raises(ImportError, match="argon2"):
+            check_hash_backends(build_pwd_context(["argon2", "bcrypt"]))
+    else:
+        check_hash_backends(build_pwd_context(["argon2", "bcrypt"]))
+
+
 @pytest.mark.parametrize(
     "endpoint, expected_status_code, expected_code",
     [
@@ -116,6 +131,10 @@ def test_user_me(login, client, endpoint, expected_status_code, expected_code):
     response = client.get(f"{server_config.api_version}/user/{endpoint}", headers=headers)
     assert response.status_code == expected_status_code
     assert response.json()["code"] == expected_code
+    # The id of the token is a str, cached or not the user is found
+    for _ in range(2):
+        response = client.get(f"{server_config.api_version}/user/{endpoint}", headers=headers)
+        assert str(response.json()["data"]["id"]) == str(user_id)
 
 
 @pytest.mark.parametrize(
@@ -142,6 +161,10 @@ def test_update_user(login, client, test_data, expected_status_code, expected_co
     assert response.status_code == expected_status_code
     assert response.json()["code"] == expected_code
 
+    # The cached user read by /me is evicted once the update commits
+    response = client.get(f"{server_config.api_version}/user/me", headers=headers)
+    assert response.json()["data"]["nickname"] == test_data["nickname"]
+
 
 @pytest.mark.parametrize(
     "endpoint, expected_status_code",
@@ -173,6 +196,35 @@ def test_export_user(login, client, endpoint, expected_status_code):
     headers = {"Authorization": f"Bearer {access_token}"}
     response = client.get(f"{server_config.api_version}/user/{endpoint}", headers=headers)
     assert response.status_code == expected_status_code
+    export_df = pd.read_excel(io.BytesIO(response.content))
+    assert list(export_df.columns) == ["id", "username", "nickname"]
+    assert user_id in export_df["id"].astype(str).tolist()
+
+
+@pytest.mark.parametrize(
+    "export_format, compress",
+    [
+        ("csv", False),
+        ("ndjson", False),
+        ("csv", True),
+    ],
+)
+def test_export_user_stream(login, client, export_format, compress):
+    access_token, user_id = login
+    headers = {"Authorization": f"Bearer {access_token}"}
+    response = client.get(
+        f"{server_config.api_version}/user/export",
+        params={"format": export_format, "compress": compress, "all": True},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    content = gzip.decompress(response.content) if compress else response.content
+    lines = content.decode("utf-8").splitlines()
+    if export_format == "csv":
+        assert lines[0] == "id,username,nickname"
+        assert any(line.startswith(f"{user_id},") for line in lines[1:])
+    else:
+        assert any(str(json.loads(line)["id"]) == user_id for line in lines)
 
 
 @pytest.mark.parametrize(
@@ -208,6 +260,21 @@ def test_import_user(login, client, endpoint, expected_status_code, expected_cod
     assert response.json()["code"] == expected_code
 
 
+def test_import_user_csv(login, client):
+    access_token, user_id = login
+    headers = {"Authorization": f"Bearer {access_token}"}
+    buffer = io.BytesIO("username,password,nickname\nexample_user_3,Password3,nickname\n".encode("utf-8"))
+
+    response = client.post(
+        f"{server_config.api_version}/user/import",
+        headers=headers,
+        files={"file": ("test_users.csv", buffer, "text/csv")},
+    )
+    assert response.status_code == 200
+    assert response.json()["code"] == 0
+    assert response.json()["data"] == 1
+
+
 @pytest.mark.parametrize(
     "endpoint, expected_status_code, expected_code",
     [
@@ -246,6 +313,50 @@ def test_import_user_error(login, client, endpoint, expected_status_code, expect
     assert response.json()["code"] == expected_code
 
 
+def list_usernames(client, headers):
+    response = client.post(f"{server_config.api_version}/user/list", json={"page": 1, "size": 100}, headers=headers)
+    return {record["username"] for record in response.json()["data"]}
+
+
+def test_import_user_rejected_unchanged(login, client):
+    access_token, user_id = login
+    headers = {"Authorization": f"Bearer {access_token}"}
+    usernames = list_usernames(client, headers)
+    buffer = io.BytesIO(
+        "username,password,nickname\nimport_new_1,Password1,nickname\nexample_user,Password2,nickname\n".encode("utf-8")
+    )
+
+    response = client.post(
+        f"{server_config.api_version}/user/import",
+        headers=headers,
+        files={"file": ("test_users.csv", buffer, "text/csv")},
+    )
+    assert response.status_code == 200
+    assert response.json()["code"] == 100
+    # The new row of a rejected file is not kept
+    assert list_usernames(client, headers) == usernames
+
+
+def test_import_user_rejected_in_later_batch(login, client, monkeypatch):
+    access_token, user_id = login
+    headers = {"Authorization": f"Bearer {access_token}"}
+    usernames = list_usernames(client, headers)
+    monkeypatch.setattr(UserServiceImpl, "import_batch_size", 1)
+    buffer = io.BytesIO(
+        "username,password,nickname\nimport_new_2,Password1,nickname\nimport_new_3,Password2,nickname\n"
+        "example_user,Password3,nickname\n".encode("utf-8")
+    )
+
+    response = client.post(
+        f"{server_config.api_version}/user/import",
+        headers=headers,
+        files={"file": ("test_users.csv", buffer, "text/csv")},
+    )
+    assert response.json()["code"] == 100
+    # The batches before the rejected one are rolled back too
+    assert list_usernames(client, headers) == usernames
+
+
 @pytest.mark.parametrize(
     "endpoint, test_data, expected_status_code, expected_code",
     [
@@ -255,6 +366,24 @@ def test_import_user_error(login, client, endpoint, expected_status_code, expect
             200,
             0,
         ),
+        (
+            "list",
+            {"page": 1, "size": 10, "count": True, "count_strategy": "exact"},
+            200,
+            0,
+        ),
+        (
+            "list",
+            {"page": 1, "size": 10, "count": True, "count_strategy": "estimated"},
+            200,
+            0,
+        ),
+        (
+            "list",
+            {"page": 1, "size": 10, "count": True, "count_strategy": "cached"},
+            200,
+            0,
+        ),
     ],
 )
 def test_list_user(login, client, endpoint, test_data, expected_status_code, expected_code):
@@ -267,6 +396,63 @@ def test_list_user(login, client, endpoint, test_data, expected_status_code, exp
     )
     assert response.status_code == expected_status_code
     assert response.json()["code"] == expected_code
+    if test_data["count"]:
+        data = response.json()["data"]
+        assert data["total"] == len(data["records"])
+
+
+@pytest.mark.parametrize(
+    "order_by, sort_order",
+    [
+        ("id", "asc"),
+        ("username", "desc"),
+        ("avatar", "asc"),
+        ("avatar", "desc"),
+    ],
+)
+def test_list_user_by_cursor(login, client, order_by, sort_order):
+    access_token, user_id = login
+    headers = {"Authorization": f"Bearer {access_token}"}
+    test_data = {"size": 1, "cursor": "", "order_by": order_by, "sort_order": sort_order}
+    response = client.post(f"{server_config.api_version}/user/list", json=test_data, headers=headers)
+    assert response.status_code == 200
+    first_page = response.json()["data"]
+    assert len(first_page["records"]) == 1
+    assert first_page["next_cursor"]
+
+    test_data["cursor"] = first_page["next_cursor"]
+    response = client.post(f"{server_config.api_version}/user/list", json=test_data, headers=headers)
+    second_page = response.json()["data"]
+    assert len(second_page["records"]) == 1
+    assert second_page["records"][0]["id"] != first_page["records"][0]["id"]
+
+
+@pytest.mark.parametrize(
+    "order_by, sort_order",
+    [
+        ("avatar", "asc"),
+        ("avatar", "desc"),
+        ("nickname", "asc"),
+        ("nickname", "desc"),
+    ],
+)
+def test_list_user_by_cursor_nullable(login, client, order_by, sort_order):
+    access_token, user_id = login
+    headers = {"Authorization": f"Bearer {access_token}"}
+    response = client.post(f"{server_config.api_version}/user/list", json={"page": 1, "size": 100}, headers=headers)
+    all_ids = {record["id"] for record in response.json()["data"]}
+
+    # Walking every page by a nullable column visits each row exactly once, NULL rows included
+    seen_ids = []
+    test_data = {"size": 1, "cursor": "", "order_by": order_by, "sort_order": sort_order}
+    while test_data["cursor"] is not None:
+        response = client.post(f"{server_config.api_version}/user/list", json=test_data, headers=headers)
+        assert response.status_code == 200
+        page = response.json()["data"]
+        seen_ids += [record["id"] for record in page["records"]]
+        test_data["cursor"] = page["next_cursor"]
+    assert len(seen_ids) == len(set(seen_ids))
+    assert set(seen_ids) == all_ids
 
 
 @pytest.mark.parametrize(